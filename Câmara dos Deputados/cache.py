@@ -0,0 +1,152 @@
+'''This module implements a local cache for the responses of the API.
+
+The cache is kept on disk, keyed by the full URL requested,
+and is revalidated with ETag and Last-Modified when it expires.'''
+
+
+import hashlib
+import json
+import os
+import pathlib
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class ResponseCache():
+    '''Guarda em disco as respostas da API, uma entrada por URL.
+
+    Uma entrada é usada sem acessar a API enquanto tiver menos de ttl
+    segundos. Depois disso ela é revalidada com os cabeçalhos ETag e
+    Last-Modified, quando a API os envia, ou requisitada novamente.
+    ttl igual a None faz com que as entradas nunca expirem.'''
+    def __init__(self,
+                 caminho: pathlib.Path | str = "./.cache/api",
+                 ttl: float | None = 24 * 60 * 60) -> None:
+        self.caminho = pathlib.Path(caminho)
+        self.caminho.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+    def __chave(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def __arquivos(self, url: str) -> tuple[pathlib.Path, pathlib.Path]:
+        chave = self.__chave(url)
+        return (self.caminho.joinpath(f"{chave}.json"),
+                self.caminho.joinpath(f"{chave}.body"))
+
+    def ler(self, url: str) -> tuple[dict, bytes] | None:
+        """Retorna os metadados e o corpo salvos de uma URL,
+        ou None caso a URL não esteja no cache."""
+        arquivo_meta, arquivo_corpo = self.__arquivos(url)
+        try:
+            meta = json.loads(arquivo_meta.read_text("utf-8"))
+            corpo = arquivo_corpo.read_bytes()
+        except FileNotFoundError:
+            return None
+        return meta, corpo
+
+    def fresca(self, meta: dict) -> bool:
+        """Diz se uma entrada ainda pode ser usada sem revalidação"""
+        if self.ttl is None:
+            return True
+        return time.time() - meta["salvo_em"] < self.ttl
+
+    def salvar(self, url: str, response: requests.Response) -> None:
+        """Salva uma resposta, identificada pela URL requisitada"""
+        meta = {"url": url,
+                "status": response.status_code,
+                "headers": dict(response.headers),
+                "encoding": response.encoding,
+                "salvo_em": time.time()}
+        arquivo_meta, arquivo_corpo = self.__arquivos(url)
+        self.__escrever(arquivo_corpo, response.content)
+        self.__escrever(arquivo_meta,
+                        json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def renovar(self, url: str, meta: dict) -> None:
+        """Marca uma entrada revalidada pela API (status 304) como nova"""
+        meta["salvo_em"] = time.time()
+        arquivo_meta, _ = self.__arquivos(url)
+        self.__escrever(arquivo_meta,
+                        json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def __escrever(self, arquivo: pathlib.Path, conteudo: bytes) -> None:
+        # Escreve em um arquivo temporário e substitui o original,
+        # evitando entradas pela metade com requisições concorrentes
+        temporario = arquivo.with_name(f"{arquivo.name}.{os.getpid()}"
+                                       f".{time.monotonic_ns()}.tmp")
+        temporario.write_bytes(conteudo)
+        os.replace(temporario, arquivo)
+
+    def revalidavel(self, meta: dict) -> bool:
+        """Diz se uma entrada tem ETag ou Last-Modified,
+        podendo ser revalidada pela API depois de expirar"""
+        cabecalhos = CaseInsensitiveDict(meta["headers"])
+        return "etag" in cabecalhos or "last-modified" in cabecalhos
+
+    def evict(self) -> int:
+        """Remove as entradas expiradas que não podem ser revalidadas,
+        retornando quantas foram removidas.
+
+        As entradas expiradas com ETag ou Last-Modified são mantidas,
+        pois a próxima requisição as revalida e recebe somente o status 304
+        quando os dados não mudaram."""
+        if self.ttl is None:
+            return 0
+        removidas = 0
+        for arquivo_meta in self.caminho.glob("*.json"):
+            meta = json.loads(arquivo_meta.read_text("utf-8"))
+            if not self.fresca(meta) and not self.revalidavel(meta):
+                arquivo_meta.unlink(missing_ok=True)
+                arquivo_meta.with_suffix(".body").unlink(missing_ok=True)
+                removidas += 1
+        return removidas
+
+
+def resposta_cache(meta: dict, corpo: bytes) -> requests.Response:
+    """Reconstrói uma Response a partir de uma entrada do cache"""
+    response = requests.Response()
+    response.status_code = meta["status"]
+    response.headers = CaseInsensitiveDict(meta["headers"])
+    response.encoding = meta["encoding"]
+    response.url = meta["url"]
+    response.reason = "OK"
+    response._content = corpo  # pylint: disable=protected-access
+    return response
+
+
+class CachedSession(requests.Session):
+    '''Session que responde as requisições GET a partir de um ResponseCache.
+
+    As demais requisições são feitas normalmente.
+    Somente respostas com status 2xx são salvas.'''
+    def __init__(self, cache: ResponseCache) -> None:
+        super().__init__()
+        self.cache = cache
+
+    def request(self, method, url, *args, **kwargs):
+        if method.upper() != "GET":
+            return super().request(method, url, *args, **kwargs)
+
+        entrada = self.cache.ler(url)
+        if entrada is not None and self.cache.fresca(entrada[0]):
+            return resposta_cache(*entrada)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entrada is not None:
+            cabecalhos = CaseInsensitiveDict(entrada[0]["headers"])
+            if "etag" in cabecalhos:
+                headers["If-None-Match"] = cabecalhos["etag"]
+            if "last-modified" in cabecalhos:
+                headers["If-Modified-Since"] = cabecalhos["last-modified"]
+
+        response = super().request(method, url, *args,
+                                   headers=headers, **kwargs)
+        if response.status_code == 304 and entrada is not None:
+            self.cache.renovar(url, entrada[0])
+            return resposta_cache(*entrada)
+        if response.status_code >= 200 and response.status_code < 300:
+            self.cache.salvar(url, response)
+        return response
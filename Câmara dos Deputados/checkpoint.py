@@ -0,0 +1,115 @@
+'''This module keeps the pages already retrieved from the API on disk.
+
+The checkpoint is a SQLite file, so an interrupted scrape can be run again
+without requesting the pages it already has.'''
+
+
+import json
+import pathlib
+import sqlite3
+
+
+class Checkpoint():
+    '''Armazena as páginas de discursos já requisitadas em um arquivo SQLite.
+
+    Cada página é identificada pela sua URL completa e guarda o
+    identificador do deputado, os dados retornados pela API e a URL da
+    próxima página, permitindo refazer a paginação sem acessar a API.
+    Também guarda as janelas de datas já coletadas de cada deputado.'''
+    def __init__(self, caminho: pathlib.Path | str = "checkpoint.sqlite"
+                 ) -> None:
+        self.caminho = pathlib.Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.conexao = sqlite3.connect(self.caminho)
+        self.conexao.execute("""CREATE TABLE IF NOT EXISTS paginas (
+                                    url TEXT PRIMARY KEY,
+                                    id_deputado INTEGER NOT NULL,
+                                    proxima TEXT,
+                                    dados TEXT NOT NULL,
+                                    ultimo_inicio TEXT)""")
+        self.conexao.execute("""CREATE INDEX IF NOT EXISTS paginas_deputado
+                                ON paginas (id_deputado)""")
+        self.conexao.execute("""CREATE TABLE IF NOT EXISTS janelas (
+                                    id_deputado INTEGER NOT NULL,
+                                    data_inicio TEXT NOT NULL,
+                                    data_fim TEXT NOT NULL,
+                                    PRIMARY KEY (id_deputado, data_inicio,
+                                                 data_fim))""")
+        self.conexao.commit()
+
+    def pagina(self, url: str) -> tuple[list[dict], str | None] | None:
+        """Retorna os dados e a URL da próxima página de uma URL já salva.
+
+        Retorna None caso a página ainda não tenha sido requisitada."""
+        linha = self.conexao.execute(
+            "SELECT dados, proxima FROM paginas WHERE url = ?",
+            (url,)).fetchone()
+        if linha is None:
+            return None
+        return json.loads(linha[0]), linha[1]
+
+    def salvar_pagina(self,
+                      url: str,
+                      id_deputado: int,
+                      dados: list[dict],
+                      proxima: str | None) -> None:
+        """Salva uma página de discursos, substituindo a anterior da URL"""
+        inicios = [discurso["dataHoraInicio"] for discurso in dados
+                   if discurso.get("dataHoraInicio")]
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?)",
+            (url,
+             id_deputado,
+             proxima,
+             json.dumps(dados, ensure_ascii=False),
+             max(inicios, default=None)))
+        self.conexao.commit()
+
+    def dados_deputado(self, id_deputado: int) -> list[dict]:
+        """Retorna os discursos de todas as páginas salvas de um deputado,
+        na ordem em que foram salvas."""
+        linhas = self.conexao.execute(
+            "SELECT dados FROM paginas WHERE id_deputado = ? ORDER BY rowid",
+            (id_deputado,))
+        dados = []
+        for linha in linhas:
+            dados.extend(json.loads(linha[0]))
+        return dados
+
+    def ultimo_inicio(self, id_deputado: int) -> str | None:
+        """Retorna o maior dataHoraInicio salvo para um deputado"""
+        linha = self.conexao.execute(
+            "SELECT MAX(ultimo_inicio) FROM paginas WHERE id_deputado = ?",
+            (id_deputado,)).fetchone()
+        return linha[0]
+
+    def salvar_janela(self,
+                      id_deputado: int,
+                      data_inicio: str,
+                      data_fim: str) -> None:
+        """Registra que os discursos de um deputado entre data_inicio e
+        data_fim foram todos coletados. data_inicio vazia é o começo."""
+        self.conexao.execute(
+            "INSERT OR IGNORE INTO janelas VALUES (?, ?, ?)",
+            (id_deputado, data_inicio, data_fim))
+        self.conexao.commit()
+
+    def janela_coletada(self,
+                        id_deputado: int,
+                        data_inicio: str,
+                        data_fim: str) -> bool:
+        """Diz se uma janela salva contém a janela de data_inicio a data_fim.
+
+        Uma janela sem data_fim nunca está coletada,
+        pois pode receber novos discursos."""
+        if not data_fim:
+            return False
+        linha = self.conexao.execute(
+            """SELECT 1 FROM janelas
+               WHERE id_deputado = ? AND data_inicio <= ? AND data_fim >= ?""",
+            (id_deputado, data_inicio, data_fim)).fetchone()
+        return linha is not None
+
+    def close(self) -> None:
+        """Fecha a conexão com o arquivo"""
+        self.conexao.close()
@@ -1,10 +1,17 @@
 '''This module defines some classes to be used in other classes
-The classes here implemented are data classes'''
+The classes here implemented are data classes
+
+The classes use __slots__, so no instance keeps a __dict__,
+and the speeches can also be kept on the columnar Discursos class.'''
+
+import hashlib
 
 
 class Partido():
     '''This class is made to represent a party from the deputies chamber
     This class is a data class.'''
+    __slots__ = ("Id", "sigla", "nome", "uri")
+
     def __init__(self, requisicao) -> None:
         self.Id = requisicao["id"]
         self.sigla = requisicao["sigla"]
@@ -31,6 +38,9 @@ class Deputado():
     '''This class represents a deputy from the deputies chamber.
 
     This class is made as a data class.'''
+    __slots__ = ("Id", "uri", "nome", "sigla_partido", "uri_partido",
+                 "sigla_uf", "id_legislatura", "url_foto", "email")
+
     def __init__(self, requisicao) -> None:
         self.Id = requisicao["id"]
         self.uri = requisicao["uri"]
@@ -74,6 +84,8 @@ class FaseEvento():
     '''This data class holds the phase of the event that a speech was made.
 
     This class is a data class'''
+    __slots__ = ("data_hora_fim", "data_hora_inicio", "titulo")
+
     def __init__(self, requisicao) -> None:
         self.data_hora_fim = requisicao["dataHoraFim"]
         self.data_hora_inicio = requisicao["dataHoraInicio"]
@@ -83,6 +95,10 @@ class FaseEvento():
 class Discurso():
     '''This data class contains the infomation from a speech.
     This is a data class.'''
+    __slots__ = ("data_hora_fim", "data_hora_inicio", "fase_evento",
+                 "keywords", "sumario", "tipo_discurso", "transcricao",
+                 "uri_evento", "url_audio", "url_texto", "url_video")
+
     def __init__(self, requisicao) -> None:
         self.data_hora_fim = requisicao["dataHoraFim"]
         self.data_hora_inicio = requisicao["dataHoraInicio"]
@@ -113,6 +129,56 @@ class Discurso():
                 self.url_texto,
                 self.url_video]
 
+    def chave(self) -> str:
+        """Returns a stable hash of all the fields of the speech.
+
+        Two equal speeches have the same key, so repeated speeches
+        can be found without comparing the whole transcription."""
+        return chave_discurso(self.to_list())
+
+    @classmethod
+    def from_list(cls, valores: list) -> "Discurso":
+        """Creates a Discurso from a list in the order of to_list"""
+        discurso = cls.__new__(cls)
+        fase_evento = FaseEvento.__new__(FaseEvento)
+        (discurso.data_hora_fim,
+         discurso.data_hora_inicio,
+         fase_evento.data_hora_fim,
+         fase_evento.data_hora_inicio,
+         fase_evento.titulo,
+         discurso.keywords,
+         discurso.sumario,
+         discurso.tipo_discurso,
+         discurso.transcricao,
+         discurso.uri_evento,
+         discurso.url_audio,
+         discurso.url_texto,
+         discurso.url_video) = valores
+        discurso.fase_evento = fase_evento
+        return discurso
+
+    @classmethod
+    def colunas(cls, dados: list[dict]) -> dict[str, list]:
+        """Turns a page of speeches, resp.json()["dados"], into one list
+        for each column, named as in get_variables.
+
+        No Discurso object is created."""
+        fases = [discurso["faseEvento"] for discurso in dados]
+        return {"dataHoraFim": [d["dataHoraFim"] for d in dados],
+                "dataHoraInicio": [d["dataHoraInicio"] for d in dados],
+                "faseVento.dataHoraFim": [f["dataHoraFim"] for f in fases],
+                "faseEvento.dataHoraInicio": [f["dataHoraInicio"]
+                                              for f in fases],
+                "faseEvento.titulo": [f["titulo"] for f in fases],
+                "keywords": [d["keywords"] for d in dados],
+                "sumario": [d["sumario"] for d in dados],
+                "tipoDiscurso": [d["tipoDiscurso"] for d in dados],
+                "transcricao": [d["transcricao"] for d in dados],
+                "uriEvento": [d["uriEvento"] for d in dados],
+                "urlAudio": [d["urlAudio"] for d in dados],
+                "urlTexto": [d["urlTexto"] for d in dados],
+                "urlVideo": [d["urlVideo"] for d in dados]}
+
     @classmethod
     def get_variables(cls):
         '''Returns a list of names for the Discurso class.
@@ -130,3 +196,62 @@ class Discurso():
                 "urlAudio",
                 "urlTexto",
                 "urlVideo"]
+
+
+def chave_discurso(valores: list) -> str:
+    """Returns a stable hash of the fields of a speech,
+    given in the order of Discurso.get_variables."""
+    campos = "\x1f".join(str(campo) for campo in valores)
+    return hashlib.blake2b(campos.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Discursos():
+    '''This class holds many speeches in columns, one list for each
+    variable of Discurso, instead of one object for each speech.
+
+    Iterating over it creates the Discurso objects on demand.'''
+    __slots__ = ("colunas",)
+
+    def __init__(self, paginas: list[list[dict]] | None = None) -> None:
+        self.colunas: dict[str, list] = {variavel: []
+                                         for variavel
+                                         in Discurso.get_variables()}
+        for dados in paginas or []:
+            self.extend(dados)
+
+    def extend(self, dados: list[dict]) -> None:
+        """Adds a page of speeches, resp.json()["dados"], to the columns"""
+        for variavel, valores in Discurso.colunas(dados).items():
+            self.colunas[variavel].extend(valores)
+
+    def linhas(self):
+        """Iterates over the speeches as lists, in the order of to_list"""
+        return zip(*self.colunas.values())
+
+    def chaves(self) -> list[str]:
+        """Returns the key of each speech, as in Discurso.chave"""
+        return [chave_discurso(linha) for linha in self.linhas()]
+
+    def unicos(self) -> "Discursos":
+        """Returns the speeches without the repeated ones,
+        keeping the first speech of each key"""
+        vistas: set[str] = set()
+        indices = []
+        for i, chave in enumerate(self.chaves()):
+            if chave not in vistas:
+                vistas.add(chave)
+                indices.append(i)
+        unicos = Discursos()
+        unicos.colunas = {variavel: [valores[i] for i in indices]
+                          for variavel, valores in self.colunas.items()}
+        return unicos
+
+    def __len__(self) -> int:
+        return len(self.colunas["transcricao"])
+
+    def __iter__(self):
+        return (Discurso.from_list(list(linha)) for linha in self.linhas())
+
+    def __getitem__(self, i: int) -> Discurso:
+        return Discurso.from_list([valores[i]
+                                   for valores in self.colunas.values()])
@@ -0,0 +1,118 @@
+'''This module writes the speeches to Parquet files while they are retrieved.
+
+The files are partitioned by legislature, party and year, replacing the
+single CSV per party written at the end of the scrape.'''
+
+
+import pathlib
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import new_auxiliar
+
+
+def _colunas_unicas(colunas: list[str]) -> list[str]:
+    """Renomeia as colunas repetidas como o pandas faz ao ler um CSV,
+    nome, nome.1, ..., pois o Parquet não aceita colunas repetidas."""
+    unicas = []
+    repeticoes: dict[str, int] = {}
+    for coluna in colunas:
+        vezes = repeticoes.get(coluna, 0)
+        repeticoes[coluna] = vezes + 1
+        unicas.append(coluna if vezes == 0 else f"{coluna}.{vezes}")
+    return unicas
+
+
+COLUNAS = _colunas_unicas(new_auxiliar.Partido.get_variables() +
+                          new_auxiliar.Deputado.get_variables() +
+                          new_auxiliar.Discurso.get_variables())
+# Partido e Deputado possuem as colunas nome e uri
+
+SCHEMA = pa.schema([(coluna, pa.int64())
+                    if coluna in ("IdPartido", "IdDeputado", "idLegislatura")
+                    else (coluna, pa.string())
+                    for coluna in COLUNAS])
+# O schema é fixo para que todos os arquivos possam ser lidos juntos,
+# mesmo quando uma coluna só possui valores nulos em algum deles
+
+SEM_ANO = "__HIVE_DEFAULT_PARTITION__"  # Partição nula padrão do pyarrow
+
+
+def _tabela_salva(arquivo: pathlib.Path) -> pa.Table | None:
+    """Lê um arquivo já escrito, ou retorna None caso ele não exista"""
+    if not arquivo.exists():
+        return None
+    return pq.read_table(arquivo, schema=SCHEMA)
+
+
+def _chaves_tabela(tabela: pa.Table | None) -> list[str]:
+    """Retorna a chave de cada discurso de uma tabela, como Discurso.chave"""
+    if tabela is None:
+        return []
+    variaveis = new_auxiliar.Discurso.get_variables()
+    colunas = [tabela.column(coluna).to_pylist()
+               for coluna in COLUNAS[-len(variaveis):]]
+    return [new_auxiliar.chave_discurso(linha) for linha in zip(*colunas)]
+
+
+class ParquetSink():
+    '''Escreve os discursos de cada deputado assim que são requisitados.
+
+    Os arquivos seguem o particionamento hive
+    raiz/legislatura=56/partido=NOVO/ano=2022/{IdDeputado}.parquet,
+    com as mesmas colunas de partido_to_dataframe.
+    Os discursos de um deputado ficam em um único arquivo por ano,
+    e uma nova coleta é juntada aos discursos já salvos no arquivo,
+    então coletas de partes de um ano não apagam as anteriores.
+    Os discursos repetidos são removidos pela chave de Discurso.chave,
+    lendo somente o arquivo do deputado sendo escrito,
+    mantendo a memória constante ao longo da coleta.'''
+    def __init__(self, raiz: pathlib.Path | str = "./discursos/parquet/"
+                 ) -> None:
+        self.raiz = pathlib.Path(raiz)
+        self.raiz.mkdir(parents=True, exist_ok=True)
+        self.n_discursos = 0
+
+    def escrever(self,
+                 partido: new_auxiliar.Partido,
+                 deputado: new_auxiliar.Deputado,
+                 discursos: new_auxiliar.Discursos) -> int:
+        """Escreve os discursos de um deputado, retornando quantos foram
+        escritos. Discursos repetidos do deputado, inclusive os já salvos
+        nos arquivos, são descartados."""
+        anos: dict[str, list[int]] = {}
+        inicios = discursos.colunas["dataHoraInicio"]
+        chaves: set[str] = set()
+        chaves_discursos = discursos.chaves()
+        for i, chave in enumerate(chaves_discursos):
+            if chave in chaves:
+                continue
+            chaves.add(chave)
+            ano = inicios[i][:4] if inicios[i] else SEM_ANO
+            anos.setdefault(ano, []).append(i)
+
+        fixas = partido.to_list() + deputado.to_list()
+        for ano, indices in anos.items():
+            pasta = self.raiz.joinpath(
+                f"legislatura={deputado.id_legislatura}",
+                f"partido={partido.sigla}",
+                f"ano={ano}")
+            pasta.mkdir(parents=True, exist_ok=True)
+            arquivo = pasta.joinpath(f"{deputado.Id}.parquet")
+            salva = _tabela_salva(arquivo)
+            salvas = set(_chaves_tabela(salva))
+            indices = [i for i in indices if chaves_discursos[i] not in salvas]
+            anos[ano] = indices
+            colunas = [[valor] * len(indices) for valor in fixas]
+            colunas += [[valores[i] for i in indices]
+                        for valores in discursos.colunas.values()]
+            tabela = pa.Table.from_arrays(colunas, schema=SCHEMA)
+            if salva is not None:
+                if not indices:
+                    continue
+                tabela = pa.concat_tables([salva, tabela])
+            pq.write_table(tabela, arquivo)
+        escritos = sum(len(indices) for indices in anos.values())
+        self.n_discursos += escritos
+        return escritos
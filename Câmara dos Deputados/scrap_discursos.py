@@ -3,13 +3,26 @@ This module has the responsable functions for retrieving the data from the API.
 '''
 
 
+import asyncio
+import contextlib
+import datetime
 import urllib.parse
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from requests.structures import CaseInsensitiveDict
 import pandas as pd
 
 import new_auxiliar
+from checkpoint import Checkpoint
+from cache import CachedSession, ResponseCache
+from parquet_sink import ParquetSink
+
+URL_API = "https://dadosabertos.camara.leg.br/api/v2"
+# Pode ser trocada, por exemplo, por um servidor local nos testes
+ENDPOINT_DISCURSOS = "/deputados/{id}/discursos"
+ENDPOINT_MEMBROS = "/partidos/{id}/membros"
+ENDPOINT_PARTIDOS = "/partidos"
 
 
 def create_params(id_legislatura,
@@ -33,6 +46,61 @@ def create_params(id_legislatura,
     return params
 
 
+def monta_url(endpoint: str,
+              params: dict[str, str | list[str]],
+              **ids) -> str:
+    """Monta a URL de um endpoint da API com a query dos parâmetros.
+
+    Os identificadores do caminho, como {id}, são substituídos por ids."""
+    query = urllib.parse.urlencode(params, doseq=True)
+    url = ''.join([URL_API, endpoint, "?", query])
+    return url.format(**ids)
+
+
+def cria_sessao(max_conexoes: int = 10,
+                cache: ResponseCache | None = None,
+                instrumentation=None) -> requests.Session:
+    """Cria a Session usada nas requisições, aceitando somente JSON.
+
+    max_conexoes define o tamanho do pool de conexões,
+    que deve acompanhar o número de requisições concorrentes.
+    Com um cache, as respostas são salvas em disco e reutilizadas,
+    e as entradas expiradas do cache que não podem ser revalidadas
+    são removidas ao criar a sessão.
+    Com uma instrumentation (instrumentation.Instrumentation da raiz do
+    repositório), as requisições feitas à API e os status 429 são contados
+    pelo seu response_hook. Respostas vindas do cache não são contadas."""
+    headers = CaseInsensitiveDict()
+    headers["accept"] = "application/json"
+    if cache is not None:
+        cache.evict()
+    s = requests.Session() if cache is None else CachedSession(cache)
+    s.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=max_conexoes,
+                          pool_maxsize=max_conexoes)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    if instrumentation is not None:
+        s.hooks["response"].append(instrumentation.response_hook)
+    return s
+
+
+def _etapa(instrumentation, nome: str, items: int | None = None):
+    """Mede uma etapa da coleta com a instrumentation, quando houver.
+
+    Retorna um gerenciador de contexto que fornece o registro da etapa."""
+    if instrumentation is None:
+        return contextlib.nullcontext({"items": items})
+    return instrumentation.stage(nome, items=items)
+
+
+def _n_discursos(membros: list) -> int:
+    """Conta os discursos de uma lista de membros de um partido"""
+    return sum(len(discursos)
+               for dict_deputado in membros
+               for discursos in dict_deputado.values())
+
+
 def req_url(s: requests.Session, url: str) -> requests.Response:
     """Resquests a certain URL using the given Session that is being used.
     Does not return until the URL responses, can make the function run forever.
@@ -48,61 +116,184 @@ def req_url(s: requests.Session, url: str) -> requests.Response:
     return response
 
 
-def req_discursos(deputado: int,
-                  s: requests.Session,
-                  params: dict[str, str | list[str]],
-                  ordenar_por: str = "dataHoraInicio") -> list:
-    """Requisita os discursos de um Deputado baseado no ID do Deputado"""
-    url_list = []
-    resps: list[requests.Response] = []
-    url_base = "https://dadosabertos.camara.leg.br/api/v2/deputados/{id}/discursos"
-    url_list.append(url_base)
-
+def _discursos_paginas(paginas: list[list[dict]]) -> new_auxiliar.Discursos:
+    """Transforma as páginas de discursos de um deputado em Discursos,
+    guardados em colunas"""
+    return new_auxiliar.Discursos(paginas)
+
+
+def _proxima_pagina(response: requests.Response) -> str | None:
+    """Retorna a URL da próxima página de uma resposta paginada"""
+    if "next" in response.links:
+        return response.links["next"]["url"]
+    return None
+
+
+def _inicio_incremental(deputado: int,
+                        params: dict[str, str | list[str]],
+                        checkpoint: Checkpoint) -> bool:
+    """Altera a dataInicio dos parâmetros para o dia do último discurso
+    salvo do deputado, requisitando somente os discursos mais novos.
+
+    A dataInicio só é alterada quando esse dia está entre a dataInicio e
+    a dataFim, pois discursos salvos de outra janela não dizem nada sobre
+    esta. Retorna False quando a janela já foi coletada e não precisa
+    ser requisitada."""
+    data_inicio = str(params.get("dataInicio", ""))
+    data_fim = str(params.get("dataFim", ""))
+    if checkpoint.janela_coletada(deputado, data_inicio, data_fim):
+        return False
+    ultimo_inicio = checkpoint.ultimo_inicio(deputado)
+    if ultimo_inicio is None:
+        return True
+    ultimo_dia = ultimo_inicio[:10]  # A API só aceita datas, sem horários
+    if data_inicio < ultimo_dia and (not data_fim or ultimo_dia <= data_fim):
+        params["dataInicio"] = ultimo_dia
+    return True
+
+
+def _janela_fechada(data_fim: str) -> bool:
+    """Diz se a janela termina antes de hoje, não recebendo mais discursos"""
+    return data_fim != "" and data_fim < datetime.date.today().isoformat()
+
+
+def _paginacao(url: str,
+               deputado: int,
+               checkpoint: Checkpoint | None = None,
+               atualizar: bool = False):
+    """Segue as páginas de discursos a partir da URL inicial.
+
+    É um gerador que produz as URLs que precisam ser requisitadas e recebe
+    as respostas por send, retornando as páginas ao terminar. Assim
+    _req_paginas e _req_paginas_async só diferem na requisição.
+    As páginas já salvas no checkpoint não são requisitadas novamente,
+    a não ser que atualizar seja verdadeiro."""
+    paginas = []
+    proxima: str | None = url
+    while proxima is not None:
+        url = proxima
+        pagina = None
+        if checkpoint is not None and not atualizar:
+            pagina = checkpoint.pagina(url)
+        if pagina is None:
+            response = yield url
+            dados = response.json()["dados"]
+            proxima = _proxima_pagina(response)
+            if checkpoint is not None:
+                checkpoint.salvar_pagina(url, deputado, dados, proxima)
+        else:
+            dados, proxima = pagina
+        paginas.append(dados)
+    return paginas
+
+
+def _req_paginas(s: requests.Session,
+                 url: str,
+                 deputado: int,
+                 checkpoint: Checkpoint | None = None,
+                 atualizar: bool = False) -> list[list[dict]]:
+    """Requisita todas as páginas de discursos a partir da URL inicial,
+    seguindo _paginacao."""
+    paginacao = _paginacao(url, deputado, checkpoint, atualizar)
+    try:
+        url = next(paginacao)
+        while True:
+            url = paginacao.send(req_url(s=s, url=url))
+    except StopIteration as fim:
+        return fim.value
+
+
+def _url_discursos(deputado: int,
+                   params: dict[str, str | list[str]],
+                   ordenar_por: str,
+                   checkpoint: Checkpoint | None,
+                   incremental: bool) -> str | None:
+    """Monta a URL da primeira página de discursos de um deputado,
+    a partir do último discurso salvo no modo incremental.
+
+    Retorna None quando a janela já foi coletada no modo incremental."""
     params["ordenarPor"] = ordenar_por
+    if (checkpoint is not None and incremental
+            and not _inicio_incremental(deputado, params, checkpoint)):
+        return None
+    return monta_url(ENDPOINT_DISCURSOS, params, id=deputado)
+
+
+def _fim_incremental(deputado: int,
+                     checkpoint: Checkpoint,
+                     data_inicio: str,
+                     data_fim: str) -> new_auxiliar.Discursos:
+    """Registra a janela coletada, quando ela já terminou, e retorna os
+    discursos salvos do deputado dentro dela"""
+    if _janela_fechada(data_fim):
+        checkpoint.salvar_janela(deputado, data_inicio, data_fim)
+    return _discursos_salvos(deputado, checkpoint, data_inicio, data_fim)
+
+
+def _discursos_salvos(deputado: int,
+                      checkpoint: Checkpoint,
+                      data_inicio: str = "",
+                      data_fim: str = "") -> new_auxiliar.Discursos:
+    """Retorna os discursos salvos de um deputado entre data_inicio e
+    data_fim, sem repetições.
+
+    O checkpoint guarda as páginas de todas as coletas do deputado, com
+    outras datas, e a coleta incremental requisita novamente o dia do
+    último discurso salvo, então os discursos são filtrados pela janela
+    pedida e os repetidos são removidos pela chave."""
+    dados = []
+    for discurso in checkpoint.dados_deputado(deputado):
+        dia = (discurso.get("dataHoraInicio") or "")[:10]
+        if (data_inicio or data_fim) and not dia:
+            continue
+        if data_inicio and dia < data_inicio:
+            continue
+        if data_fim and dia > data_fim:
+            continue
+        dados.append(discurso)
+    return new_auxiliar.Discursos([dados]).unicos()
 
-    query = urllib.parse.urlencode(params, doseq=True)
-    url_list.append("?")
-    url_list.append(query)
-    url_id = ''.join(url_list)
-
-    url = url_id.format(id=deputado)
-    i = 0
-    response = req_url(s=s, url=url)
-    resps.append(response)
-
-    while "next" in resps[i].links:
-        url = resps[i].links["next"]["url"]
-        response = req_url(s=s, url=url)
-        resps.append(response)
-        i += 1
-    lista_discursos = []
-    for resp in resps:
-        try:
-            lista_discursos.extend(list(map(new_auxiliar.Discurso,
-                                            resp.json()["dados"])))
-        except IndexError:  # Pode ser que esse não seja o erro correto
-            pass
-    return lista_discursos
-
-
-def req_membros(id_partido: int,
-                s: requests.Session,
-                params: dict[str, str | list[str]],
-                ordenar_por: str = "",) -> list:
-    """Requisita os discursos dos membros de um partido com ID do partido"""
-    url_list = []
-    url_base = "https://dadosabertos.camara.leg.br/api/v2/partidos/{id}/membros"
-    url_list.append(url_base)
 
+def req_discursos(deputado: int,
+                  s: requests.Session,
+                  params: dict[str, str | list[str]],
+                  ordenar_por: str = "dataHoraInicio",
+                  checkpoint: Checkpoint | None = None,
+                  incremental: bool = False) -> new_auxiliar.Discursos:
+    """Requisita os discursos de um Deputado baseado no ID do Deputado
+
+    Com um checkpoint, as páginas já salvas não são requisitadas novamente.
+    No modo incremental somente os discursos a partir do último
+    dataHoraInicio salvo são requisitados, retornando todos os discursos
+    salvos do deputado entre a dataInicio e a dataFim dos parâmetros.
+    Uma janela que já terminou e foi coletada não é requisitada de novo."""
+    janela = (str(params.get("dataInicio", "")),
+              str(params.get("dataFim", "")))
+    url = _url_discursos(deputado, params, ordenar_por, checkpoint,
+                         incremental)
+    paginas = []
+    if url is not None:
+        paginas = _req_paginas(s=s,
+                               url=url,
+                               deputado=deputado,
+                               checkpoint=checkpoint,
+                               atualizar=incremental)
+    if checkpoint is not None and incremental:
+        return _fim_incremental(deputado, checkpoint, *janela)
+    return _discursos_paginas(paginas)
+
+
+def req_deputados(id_partido: int,
+                  s: requests.Session,
+                  params: dict[str, str | list[str]],
+                  ordenar_por: str = "") -> list:
+    """Requisita os membros de um partido com ID do partido,
+    sem requisitar os seus discursos"""
     params["ordenarPor"] = ordenar_por  # Troca pois não existe "sigla"
     # Troca na cópia e não na versão original
     # Necessário até pelo fato de que as chamadas são feitas em profundidade.
 
-    query = urllib.parse.urlencode(params, doseq=True)
-    url_list.append("?")
-    url_list.append(query)
-    url_id = ''.join(url_list)
-    url = url_id.format(id=id_partido)
+    url = monta_url(ENDPOINT_MEMBROS, params, id=id_partido)
     # i = 0
     response = req_url(s=s, url=url)
 
@@ -116,38 +307,108 @@ def req_membros(id_partido: int,
     #     response = reqURL(s=s, url=url)
     #     resps.append(response)
     #     i += 1"""
-    lista_deputados = list(map(new_auxiliar.Deputado,
-                               response.json()["dados"]))
-
+    return list(map(new_auxiliar.Deputado, response.json()["dados"]))
+
+
+def deputados_unicos(deputados: list, vistos: set[int]) -> list:
+    """Remove os deputados cujo Id já está em vistos, atualizando vistos.
+
+    A API retorna deputados repetidos, tanto em mais de um partido quanto
+    no mesmo partido com o nome em maiúsculas e minúsculas.
+    É mantida a primeira ocorrência de cada deputado."""
+    unicos = []
+    for deputado in deputados:
+        if deputado.Id not in vistos:
+            vistos.add(deputado.Id)
+            unicos.append(deputado)
+    return unicos
+
+
+def req_discursos_deputados(deputados: list,
+                            s: requests.Session,
+                            params: dict[str, str | list[str]],
+                            ordenar_por: str = "",
+                            checkpoint: Checkpoint | None = None,
+                            incremental: bool = False,
+                            partido: new_auxiliar.Partido | None = None,
+                            sink: ParquetSink | None = None) -> list:
+    """Requisita os discursos de cada um dos deputados da lista
+
+    Com um sink, os discursos de cada deputado são escritos assim que
+    requisitados, junto com o partido, e não são mantidos no resultado."""
     lista_discursos_deputados = []
-    for deputado in lista_deputados:
-        lista_discursos_deputados.append({
-            deputado:
-            req_discursos(deputado=deputado.Id,
-                          s=s,
-                          params=params.copy(),
-                          ordenar_por=ordenar_por)})
+    for deputado in deputados:
+        discursos = req_discursos(deputado=deputado.Id,
+                                  s=s,
+                                  params=params.copy(),
+                                  ordenar_por=ordenar_por,
+                                  checkpoint=checkpoint,
+                                  incremental=incremental)
+        if sink is not None:
+            sink.escrever(partido, deputado, discursos)
+            discursos = new_auxiliar.Discursos()
+        lista_discursos_deputados.append({deputado: discursos})
     return lista_discursos_deputados
 
 
+def req_membros(id_partido: int,
+                s: requests.Session,
+                params: dict[str, str | list[str]],
+                ordenar_por: str = "",
+                checkpoint: Checkpoint | None = None,
+                incremental: bool = False,
+                vistos: set[int] | None = None) -> list:
+    """Requisita os discursos dos membros de um partido com ID do partido
+
+    Os discursos de cada deputado são requisitados uma única vez,
+    ignorando também os deputados cujo Id já está em vistos."""
+    if vistos is None:
+        vistos = set()
+    deputados = deputados_unicos(req_deputados(id_partido=id_partido,
+                                               s=s,
+                                               params=params,
+                                               ordenar_por=ordenar_por),
+                                 vistos)
+    return req_discursos_deputados(deputados=deputados,
+                                   s=s,
+                                   params=params,
+                                   ordenar_por=ordenar_por,
+                                   checkpoint=checkpoint,
+                                   incremental=incremental)
+
+
 def req_partidos(siglas: list[str] | None = None,
                  data_inicio: str = "",
                  data_fim: str = "",
                  id_legislatura: list[str] | None = None,
                  ordem: str = "ASC",
                  ordenar_por: str = "sigla",
-                 ordenar_por_discursos: str = ""):
+                 ordenar_por_discursos: str = "",
+                 checkpoint: Checkpoint | None = None,
+                 incremental: bool = False,
+                 cache: ResponseCache | None = None,
+                 sink: ParquetSink | None = None,
+                 instrumentation=None):
     '''Faz a requisição dos discursos dos membros de um ou mais partidos
-    baseando-se nas siglas dos Partidos'''
+    baseando-se nas siglas dos Partidos
+
+    Com um checkpoint, uma nova execução não requisita as páginas de
+    discursos já salvas, continuando de onde a anterior parou.
+    incremental faz com que sejam requisitados somente os discursos
+    mais novos que o último salvo de cada deputado.
+    Com um cache, as respostas da API são salvas em disco e reutilizadas
+    em novas execuções.
+    Com um sink, os discursos são escritos em Parquet conforme chegam,
+    e a estrutura retornada não guarda os discursos, somente os deputados,
+    mantendo o uso de memória constante durante a coleta.
+    Com uma instrumentation, são registrados o tempo e a vazão de cada
+    etapa, as requisições feitas e as esperas de retry-after.'''
 
     if siglas is None:
         siglas = []
     if id_legislatura is None:
         id_legislatura = []
-    url_list = []
     resps = []
-    url_base = "https://dadosabertos.camara.leg.br/api/v2/partidos"
-    url_list.append(url_base)
 
     params: dict[str, str | list[str]] = create_params(
         id_legislatura=id_legislatura,
@@ -156,72 +417,364 @@ def req_partidos(siglas: list[str] | None = None,
         ordenar_por=ordenar_por,
         ordem=ordem)
 
-    query = urllib.parse.urlencode(params, doseq=True)
-    url_list.append("?")
-    url_list.append(query)
-    url = ''.join(url_list)
+    url = monta_url(ENDPOINT_PARTIDOS, params)
 
-    headers = CaseInsensitiveDict()
-    headers["accept"] = "application/json"
-    s = requests.Session()
-    s.headers.update(headers)
-
-    # Criação do primeiro request de partido
-    response = req_url(s=s, url=url)
-    resps.append(response)
-    i = 0
+    s = cria_sessao(cache=cache, instrumentation=instrumentation)
 
-    while "next" in resps[i].links:
-        url = resps[i].links["next"]["url"]
+    with _etapa(instrumentation, "partidos") as etapa:
+        # Criação do primeiro request de partido
         response = req_url(s=s, url=url)
         resps.append(response)
-        i += 1
-
-    partidos = []
-    for resp in resps:
-        partidos.extend(list(map(new_auxiliar.Partido, resp.json()["dados"])))
-    lista_discursos_deputados_partidos = {}
-    for partido in partidos:
-        lista_discursos_deputados_partidos[partido] = req_membros(
+        i = 0
+
+        while "next" in resps[i].links:
+            url = resps[i].links["next"]["url"]
+            response = req_url(s=s, url=url)
+            resps.append(response)
+            i += 1
+
+        partidos = []
+        for resp in resps:
+            partidos.extend(list(map(new_auxiliar.Partido,
+                                     resp.json()["dados"])))
+        etapa["items"] = len(partidos)
+    # Os membros de todos os partidos são requisitados antes dos discursos,
+    # assim um deputado presente em mais de um partido
+    # tem os seus discursos requisitados somente uma vez
+    with _etapa(instrumentation, "deputados") as etapa:
+        vistos: set[int] = set()
+        deputados_partidos = [deputados_unicos(req_deputados(
             id_partido=partido.Id,
             s=s,
             params=params.copy(),  # Evitates that that calls change the dict
-            ordenar_por=ordenar_por_discursos)
+            ordenar_por=ordenar_por_discursos), vistos)
+            for partido in partidos]
+        etapa["items"] = len(vistos)
+
+    lista_discursos_deputados_partidos = {}
+    with _etapa(instrumentation, "discursos", items=0) as etapa:
+        for i, (partido, deputados) in enumerate(zip(partidos,
+                                                     deputados_partidos)):
+            escritos = sink.n_discursos if sink is not None else 0
+            membros = req_discursos_deputados(
+                deputados=deputados,
+                s=s,
+                params=params.copy(),
+                ordenar_por=ordenar_por_discursos,
+                checkpoint=checkpoint,
+                incremental=incremental,
+                partido=partido,
+                sink=sink)
+            lista_discursos_deputados_partidos[partido] = membros
+            etapa["items"] += (sink.n_discursos - escritos
+                               if sink is not None
+                               else _n_discursos(membros))
+            if instrumentation is not None:
+                instrumentation.progress("discursos", i + 1, len(partidos))
     return lista_discursos_deputados_partidos
 
 
+class RetryAfter():
+    '''Compartilha a espera do status 429 entre requisições concorrentes.
+
+    Quando uma das requisições recebe o retry-after da API,
+    todas as outras esperam o mesmo tempo antes de requisitar novamente,
+    como req_url faz para uma única requisição.'''
+    def __init__(self) -> None:
+        self.liberado_em = 0.0
+
+    def bloquear(self, retry_after: int) -> None:
+        """Impede novas requisições pelos próximos retry_after segundos"""
+        self.liberado_em = max(self.liberado_em,
+                               time.monotonic() + retry_after)
+
+    async def esperar(self) -> None:
+        """Aguarda até que as requisições estejam liberadas"""
+        espera = self.liberado_em - time.monotonic()
+        while espera > 0:
+            await asyncio.sleep(espera)
+            espera = self.liberado_em - time.monotonic()
+
+
+async def req_url_async(s: requests.Session,
+                        url: str,
+                        semaforo: asyncio.Semaphore,
+                        retry_after: RetryAfter) -> requests.Response:
+    """Versão concorrente de req_url.
+
+    A requisição é feita em uma thread, limitada pelo semaforo,
+    e o retry-after de um status 429 é compartilhado por todas as tarefas."""
+    while True:
+        await retry_after.esperar()
+        async with semaforo:
+            response = await asyncio.to_thread(s.get, url)
+        if response.status_code >= 200 and response.status_code < 300:
+            return response
+        if response.status_code == 429:
+            retry_after.bloquear(int(response.headers["retry-after"]))
+
+
+async def _req_paginas_async(s: requests.Session,
+                             url: str,
+                             deputado: int,
+                             semaforo: asyncio.Semaphore,
+                             retry_after: RetryAfter,
+                             checkpoint: Checkpoint | None = None,
+                             atualizar: bool = False) -> list[list[dict]]:
+    """Versão concorrente de _req_paginas.
+
+    As páginas de um mesmo deputado são seguidas em ordem,
+    pois cada página informa o endereço da próxima."""
+    paginacao = _paginacao(url, deputado, checkpoint, atualizar)
+    try:
+        url = next(paginacao)
+        while True:
+            response = await req_url_async(s, url, semaforo, retry_after)
+            url = paginacao.send(response)
+    except StopIteration as fim:
+        return fim.value
+
+
+async def req_discursos_async(deputado: int,
+                              s: requests.Session,
+                              params: dict[str, str | list[str]],
+                              semaforo: asyncio.Semaphore,
+                              retry_after: RetryAfter,
+                              ordenar_por: str = "dataHoraInicio",
+                              checkpoint: Checkpoint | None = None,
+                              incremental: bool = False
+                              ) -> new_auxiliar.Discursos:
+    """Versão concorrente de req_discursos."""
+    janela = (str(params.get("dataInicio", "")),
+              str(params.get("dataFim", "")))
+    url = _url_discursos(deputado, params, ordenar_por, checkpoint,
+                         incremental)
+    paginas = []
+    if url is not None:
+        paginas = await _req_paginas_async(s=s,
+                                           url=url,
+                                           deputado=deputado,
+                                           semaforo=semaforo,
+                                           retry_after=retry_after,
+                                           checkpoint=checkpoint,
+                                           atualizar=incremental)
+    if checkpoint is not None and incremental:
+        return _fim_incremental(deputado, checkpoint, *janela)
+    return _discursos_paginas(paginas)
+
+
+async def req_deputados_async(id_partido: int,
+                              s: requests.Session,
+                              params: dict[str, str | list[str]],
+                              semaforo: asyncio.Semaphore,
+                              retry_after: RetryAfter,
+                              ordenar_por: str = "") -> list:
+    """Versão concorrente de req_deputados"""
+    params["ordenarPor"] = ordenar_por
+    url = monta_url(ENDPOINT_MEMBROS, params, id=id_partido)
+    response = await req_url_async(s, url, semaforo, retry_after)
+    return list(map(new_auxiliar.Deputado, response.json()["dados"]))
+
+
+async def req_discursos_deputados_async(deputados: list,
+                                        s: requests.Session,
+                                        params: dict[str, str | list[str]],
+                                        semaforo: asyncio.Semaphore,
+                                        retry_after: RetryAfter,
+                                        ordenar_por: str = "",
+                                        checkpoint: Checkpoint | None = None,
+                                        incremental: bool = False,
+                                        partido: new_auxiliar.Partido
+                                        | None = None,
+                                        sink: ParquetSink | None = None
+                                        ) -> list:
+    """Versão concorrente de req_discursos_deputados.
+
+    Os discursos de todos os deputados são requisitados ao mesmo
+    tempo, mantendo a ordem dos deputados no resultado."""
+    async def discursos_deputado(deputado: new_auxiliar.Deputado
+                                 ) -> new_auxiliar.Discursos:
+        discursos = await req_discursos_async(deputado=deputado.Id,
+                                              s=s,
+                                              params=params.copy(),
+                                              semaforo=semaforo,
+                                              retry_after=retry_after,
+                                              ordenar_por=ordenar_por,
+                                              checkpoint=checkpoint,
+                                              incremental=incremental)
+        if sink is not None:
+            sink.escrever(partido, deputado, discursos)
+            discursos = new_auxiliar.Discursos()
+        return discursos
+
+    discursos = await asyncio.gather(*[discursos_deputado(deputado)
+                                       for deputado in deputados])
+    return [{deputado: discursos_deputado}
+            for deputado, discursos_deputado in zip(deputados, discursos)]
+
+
+async def req_membros_async(id_partido: int,
+                            s: requests.Session,
+                            params: dict[str, str | list[str]],
+                            semaforo: asyncio.Semaphore,
+                            retry_after: RetryAfter,
+                            ordenar_por: str = "",
+                            checkpoint: Checkpoint | None = None,
+                            incremental: bool = False,
+                            vistos: set[int] | None = None) -> list:
+    """Versão concorrente de req_membros."""
+    if vistos is None:
+        vistos = set()
+    deputados = deputados_unicos(
+        await req_deputados_async(id_partido=id_partido,
+                                  s=s,
+                                  params=params,
+                                  semaforo=semaforo,
+                                  retry_after=retry_after,
+                                  ordenar_por=ordenar_por),
+        vistos)
+    return await req_discursos_deputados_async(deputados=deputados,
+                                               s=s,
+                                               params=params,
+                                               semaforo=semaforo,
+                                               retry_after=retry_after,
+                                               ordenar_por=ordenar_por,
+                                               checkpoint=checkpoint,
+                                               incremental=incremental)
+
+
+async def req_partidos_async(siglas: list[str] | None = None,
+                             data_inicio: str = "",
+                             data_fim: str = "",
+                             id_legislatura: list[str] | None = None,
+                             ordem: str = "ASC",
+                             ordenar_por: str = "sigla",
+                             ordenar_por_discursos: str = "",
+                             max_concorrencia: int = 8,
+                             checkpoint: Checkpoint | None = None,
+                             incremental: bool = False,
+                             cache: ResponseCache | None = None,
+                             sink: ParquetSink | None = None,
+                             instrumentation=None):
+    '''Versão concorrente de req_partidos.
+
+    Os parâmetros são os mesmos de req_partidos, com max_concorrencia
+    limitando o número de requisições simultâneas à API.
+    A estrutura retornada é a mesma, podendo ser usada em
+    partido_to_dataframe.'''
+    if siglas is None:
+        siglas = []
+    if id_legislatura is None:
+        id_legislatura = []
+
+    params: dict[str, str | list[str]] = create_params(
+        id_legislatura=id_legislatura,
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        ordenar_por=ordenar_por,
+        ordem=ordem)
+
+    s = cria_sessao(max_conexoes=max_concorrencia, cache=cache,
+                    instrumentation=instrumentation)
+    semaforo = asyncio.Semaphore(max_concorrencia)
+    retry_after = RetryAfter()
+
+    with _etapa(instrumentation, "partidos") as etapa:
+        url = monta_url(ENDPOINT_PARTIDOS, params)
+        resps = [await req_url_async(s, url, semaforo, retry_after)]
+        while "next" in resps[-1].links:
+            url = resps[-1].links["next"]["url"]
+            resps.append(await req_url_async(s, url, semaforo, retry_after))
+
+        partidos = []
+        for resp in resps:
+            partidos.extend(list(map(new_auxiliar.Partido,
+                                     resp.json()["dados"])))
+        etapa["items"] = len(partidos)
+
+    # Assim como em req_partidos, os deputados repetidos entre os partidos
+    # são removidos antes de qualquer requisição de discursos
+    with _etapa(instrumentation, "deputados") as etapa:
+        deputados_partidos = await asyncio.gather(*[
+            req_deputados_async(id_partido=partido.Id,
+                                s=s,
+                                params=params.copy(),
+                                semaforo=semaforo,
+                                retry_after=retry_after,
+                                ordenar_por=ordenar_por_discursos)
+            for partido in partidos])
+        vistos: set[int] = set()
+        deputados_partidos = [deputados_unicos(deputados, vistos)
+                              for deputados in deputados_partidos]
+        etapa["items"] = len(vistos)
+
+    concluidos = 0
+
+    async def discursos_partido(partido: new_auxiliar.Partido,
+                                deputados: list) -> list:
+        nonlocal concluidos
+        membros = await req_discursos_deputados_async(
+            deputados=deputados,
+            s=s,
+            params=params.copy(),
+            semaforo=semaforo,
+            retry_after=retry_after,
+            ordenar_por=ordenar_por_discursos,
+            checkpoint=checkpoint,
+            incremental=incremental,
+            partido=partido,
+            sink=sink)
+        concluidos += 1
+        if instrumentation is not None:
+            instrumentation.progress("discursos", concluidos, len(partidos))
+        return membros
+
+    with _etapa(instrumentation, "discursos") as etapa:
+        escritos = sink.n_discursos if sink is not None else 0
+        membros = await asyncio.gather(*[
+            discursos_partido(partido, deputados)
+            for partido, deputados in zip(partidos, deputados_partidos)])
+        etapa["items"] = (sink.n_discursos - escritos
+                          if sink is not None
+                          else sum(map(_n_discursos, membros)))
+    return dict(zip(partidos, membros))
+
+
+def req_partidos_concorrente(max_concorrencia: int = 8, **kwargs):
+    '''Executa req_partidos_async, retornando a mesma estrutura
+    de req_partidos.
+
+    Os demais parâmetros são repassados para req_partidos_async.'''
+    return asyncio.run(req_partidos_async(max_concorrencia=max_concorrencia,
+                                          **kwargs))
+
+
 def partido_to_dataframe(estrutura: dict) -> pd.DataFrame:
     """Transforma a estrutura das requisições de partidos para um CSV,
     onde cada linha é um discurso"""
     list_df = []
+    chaves = set()
     for partido in estrutura:
+        partido_list = partido.to_list()
         for dict_deputado in estrutura[partido]:
             for deputado in dict_deputado:
-                for discurso in dict_deputado[deputado]:
-                    partido_list = partido.to_list()
-                    deputado_list = deputado.to_list()
-                    discurso_list = discurso.to_list()
-                    linha = partido_list + deputado_list + discurso_list
+                deputado_list = deputado.to_list()
+                discursos = dict_deputado[deputado]
+                for chave, discurso in zip(discursos.chaves(),
+                                           discursos.linhas()):
+                    # Discursos repetidos são descartados pela chave,
+                    # sem comparar a transcrição inteira
+                    if chave in chaves:
+                        continue
+                    chaves.add(chave)
+                    linha = partido_list + deputado_list + list(discurso)
                     list_df.append(linha)
 
     columns = new_auxiliar.Partido.get_variables() + \
         new_auxiliar.Deputado.get_variables() + \
         new_auxiliar.Discurso.get_variables()
     df = pd.DataFrame(data=list_df, columns=columns)
-    df = df.drop_duplicates(subset=["dataHoraFim",
-                                    "dataHoraInicio",
-                                    "faseVento.dataHoraFim",
-                                    "faseEvento.dataHoraInicio",
-                                    "faseEvento.titulo",
-                                    "keywords",
-                                    "sumario",
-                                    "tipoDiscurso",
-                                    "transcricao",
-                                    "uriEvento",
-                                    "urlAudio",
-                                    "urlTexto",
-                                    "urlVideo"])
-    # drop_duplicates deve ser feito, existem deputados repetidos,
+    # A remoção de repetidos deve ser feita, existem deputados repetidos,
     # a única diferença entre eles é o nome,
     # onde um é maiúsculo e o outro minúsculo
     return df
@@ -1,35 +1,52 @@
-'''This module shows an example on how the extractors works'''
-import pathlib
-import time
+'''This module shows an example on how the extractors works
+
+The report of the run needs the module instrumentation, from the root
+of the repository, which is found when it is run as
+PYTHONPATH=. python "Câmara dos Deputados/scraper.py"
+Run from its own folder, the scrape runs without the report.'''
 import scrap_discursos as sd
+from checkpoint import Checkpoint
+from parquet_sink import ParquetSink
+
+try:
+    from instrumentation import Instrumentation
+except ImportError:
+    Instrumentation = None
 
 
-def main():
+def main(instrumentation=None):
     '''A example of the topic extraction made
     This implementation creates the speeches files on the running folder.
-    This can be a problem depending on the ambient of execution.'''
+    This can be a problem depending on the ambient of execution.
+
+    The speeches are written to ./discursos/parquet/, partitioned by
+    legislature, party and year, while they are retrieved.
+    The report of the run is saved on ./discursos/report.json,
+    by the given instrumentation or by a verbose one,
+    when the module instrumentation can be imported.'''
     partidos = ["NOVO"]
     data_inicio = "2022-01-01"
     data_fim = "2022-12-31"
 
-    path_root = pathlib.Path("./discursos/legis_56/p_novo/2022/")
-    path_root.mkdir(parents=True, exist_ok=True)
-
-    init_time = time.time()
-    requisicoes = sd.req_partidos(siglas=partidos,
-                                  data_inicio=data_inicio,
-                                  data_fim=data_fim)
-    end_time = time.time()
-    print(end_time - init_time)
-    df = sd.partido_to_dataframe(requisicoes)
-    siglas = df["sigla"].unique().tolist()
-
-    for partido in siglas:
-        mask_partido = df["sigla"] == partido
-        df_partido = df[mask_partido]
-        df_partido = df_partido.reset_index()
-        df_partido.to_csv(pathlib.Path.joinpath(path_root,
-                                                f"discursos_{partido}.csv"))
+    # Salva as páginas requisitadas, permitindo continuar uma coleta
+    # interrompida sem requisitar novamente o que já foi salvo
+    checkpoint = Checkpoint("./discursos/checkpoint.sqlite")
+    sink = ParquetSink("./discursos/parquet/")
+    # Mostra o progresso e registra as etapas, requisições e esperas
+    if instrumentation is None and Instrumentation is not None:
+        instrumentation = Instrumentation(verbose=True)
+
+    sd.req_partidos_concorrente(siglas=partidos,
+                                data_inicio=data_inicio,
+                                data_fim=data_fim,
+                                max_concorrencia=8,
+                                checkpoint=checkpoint,
+                                sink=sink,
+                                instrumentation=instrumentation)
+    checkpoint.close()
+    if instrumentation is not None:
+        instrumentation.to_json("./discursos/report.json")
+    print(f"{sink.n_discursos} discursos salvos em {sink.raiz}")
 
 
 if __name__ == "__main__":
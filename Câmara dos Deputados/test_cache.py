@@ -0,0 +1,99 @@
+'''Testes da remoção e da revalidação das entradas do ResponseCache.'''
+
+
+import http.server
+import threading
+import time
+
+import pytest
+import requests
+
+import cache
+import scrap_discursos
+
+
+def _resposta(corpo: bytes, headers: dict | None = None
+              ) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response.headers.update(headers or {})
+    response._content = corpo  # pylint: disable=protected-access
+    return response
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Responde um JSON com ETag, ou 304 quando o If-None-Match confere"""
+    etag = '"v1"'
+    corpo = b'{"dados": [1, 2, 3]}'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.server.requisicoes.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.corpo)))
+        self.end_headers()
+        self.wfile.write(self.corpo)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+@pytest.fixture
+def servidor():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.requisicoes = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_evict_remove_entrada_expirada(tmp_path, monkeypatch):
+    response_cache = cache.ResponseCache(tmp_path, ttl=60)
+    response_cache.salvar("http://api/expirada", _resposta(b"antiga"))
+    response_cache.salvar("http://api/etag",
+                          _resposta(b"etag", {"ETag": '"v1"'}))
+    agora = time.time()
+    monkeypatch.setattr(cache.time, "time", lambda: agora + 30)
+    response_cache.salvar("http://api/fresca", _resposta(b"nova"))
+
+    monkeypatch.setattr(cache.time, "time", lambda: agora + 61)
+    assert response_cache.evict() == 1
+    assert response_cache.ler("http://api/expirada") is None
+    assert response_cache.ler("http://api/etag")[1] == b"etag"
+    assert response_cache.ler("http://api/fresca")[1] == b"nova"
+    assert len(list(tmp_path.glob("*.body"))) == 2
+
+
+def test_cria_sessao_remove_entradas_expiradas(tmp_path, monkeypatch):
+    response_cache = cache.ResponseCache(tmp_path, ttl=60)
+    response_cache.salvar("http://api/expirada", _resposta(b"antiga"))
+    agora = time.time()
+    monkeypatch.setattr(cache.time, "time", lambda: agora + 61)
+
+    scrap_discursos.cria_sessao(cache=response_cache)
+    assert response_cache.ler("http://api/expirada") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_entrada_expirada_revalidada_com_304(tmp_path, servidor):
+    url = f"http://127.0.0.1:{servidor.server_port}/partidos"
+    response_cache = cache.ResponseCache(tmp_path, ttl=0.0001)
+    s = scrap_discursos.cria_sessao(cache=response_cache)
+    assert scrap_discursos.req_url(s, url).json() == {"dados": [1, 2, 3]}
+    time.sleep(0.01)
+
+    s = scrap_discursos.cria_sessao(cache=response_cache)
+    response = scrap_discursos.req_url(s, url)
+    assert servidor.requisicoes[-1]["If-None-Match"] == '"v1"'
+    assert response.status_code == 200
+    assert response.json() == {"dados": [1, 2, 3]}
+    assert len(servidor.requisicoes) == 2
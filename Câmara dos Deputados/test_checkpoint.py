@@ -0,0 +1,89 @@
+'''Testes da coleta incremental com o Checkpoint.'''
+
+
+import json
+import urllib.parse
+
+import requests
+
+import scrap_discursos
+from checkpoint import Checkpoint
+
+
+def _discurso(dia: str) -> dict:
+    return {"dataHoraFim": None,
+            "dataHoraInicio": f"{dia}T10:00",
+            "faseEvento": {"dataHoraFim": None,
+                           "dataHoraInicio": None,
+                           "titulo": "Sessão"},
+            "keywords": "",
+            "sumario": "",
+            "tipoDiscurso": "",
+            "transcricao": f"Discurso de {dia}",
+            "uriEvento": f"evento/{dia}",
+            "urlAudio": None,
+            "urlTexto": None,
+            "urlVideo": None}
+
+
+DISCURSOS = [_discurso(f"{ano}-{mes:02}-15")
+             for ano in (2021, 2022) for mes in range(1, 13)]
+
+
+class _Sessao():
+    """Responde os discursos entre dataInicio e dataFim, em uma página"""
+    def __init__(self) -> None:
+        self.urls: list[str] = []
+
+    def get(self, url: str) -> requests.Response:
+        self.urls.append(url)
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        inicio = query.get("dataInicio", [""])[0]
+        fim = query.get("dataFim", ["9999"])[0]
+        assert inicio <= fim, "janela invertida"
+        response = requests.Response()
+        response.status_code = 200
+        response.encoding = "utf-8"
+        dados = [discurso for discurso in DISCURSOS
+                 if inicio <= discurso["dataHoraInicio"][:10] <= fim]
+        response._content = json.dumps(  # pylint: disable=protected-access
+            {"dados": dados}).encode("utf-8")
+        return response
+
+
+def _coleta(s, checkpoint, data_inicio, data_fim):
+    params = scrap_discursos.create_params([], data_inicio, data_fim,
+                                           "", "ASC")
+    return scrap_discursos.req_discursos(1, s, params,
+                                         checkpoint=checkpoint,
+                                         incremental=True)
+
+
+def test_incremental_janela_anterior_ao_ultimo_salvo(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.sqlite")
+    s = _Sessao()
+    assert len(_coleta(s, checkpoint, "2022-01-01", "2022-12-31")) == 12
+
+    discursos = _coleta(s, checkpoint, "2021-01-01", "2021-12-31")
+    assert len(discursos) == 12
+    assert "dataInicio=2021-01-01" in s.urls[-1]
+
+
+def test_incremental_avanca_dentro_da_janela(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.sqlite")
+    s = _Sessao()
+    assert len(_coleta(s, checkpoint, "2021-01-01", "2021-06-30")) == 6
+
+    discursos = _coleta(s, checkpoint, "2021-01-01", "2021-12-31")
+    assert len(discursos) == 12
+    assert "dataInicio=2021-06-15" in s.urls[-1]
+
+
+def test_incremental_janela_coletada_nao_requisita(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.sqlite")
+    s = _Sessao()
+    assert len(_coleta(s, checkpoint, "2021-01-01", "2022-12-31")) == 24
+
+    discursos = _coleta(s, checkpoint, "2021-03-01", "2021-12-31")
+    assert len(discursos) == 10
+    assert len(s.urls) == 1
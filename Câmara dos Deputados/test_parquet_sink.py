@@ -0,0 +1,34 @@
+'''Testes da escrita dos discursos em Parquet.'''
+
+
+import pyarrow.parquet as pq
+
+import new_auxiliar
+from parquet_sink import ParquetSink
+from test_checkpoint import DISCURSOS
+
+PARTIDO = new_auxiliar.Partido({"id": 1, "sigla": "A", "nome": "Partido A",
+                                "uri": "partidos/1"})
+DEPUTADO = new_auxiliar.Deputado({"id": 10, "uri": "deputados/10",
+                                  "nome": "Deputado", "siglaPartido": "A",
+                                  "uriPartido": "partidos/1",
+                                  "siglaUf": "SP", "idLegislatura": 56,
+                                  "urlFoto": "", "email": None})
+
+
+def test_coleta_parcial_junta_discursos_salvos(tmp_path):
+    sink = ParquetSink(tmp_path)
+    ano_2022 = DISCURSOS[12:]
+    assert sink.escrever(PARTIDO, DEPUTADO,
+                         new_auxiliar.Discursos([ano_2022])) == 12
+
+    # Segundo semestre, com os discursos já salvos e um novo
+    novo = dict(ano_2022[-1], transcricao="Outro discurso")
+    assert sink.escrever(PARTIDO, DEPUTADO,
+                         new_auxiliar.Discursos([ano_2022[6:] + [novo]])
+                         ) == 1
+
+    arquivo = tmp_path / "legislatura=56/partido=A/ano=2022/10.parquet"
+    transcricoes = pq.read_table(arquivo).column("transcricao").to_pylist()
+    assert len(transcricoes) == 13
+    assert transcricoes.count("Outro discurso") == 1
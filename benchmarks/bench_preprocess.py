@@ -0,0 +1,67 @@
+'''Benchmark of preprocess.preprocess on a legislature-sized corpus.
+
+Compares the preprocessing used before, with four list comprehensions
+over the corpus and the patterns given as strings to re.sub, with the
+compiled single-pass engine, both as a list and as a generator.
+
+Run it from the root of the repository:
+
+    python -m benchmarks.bench_preprocess
+'''
+
+import re
+import time
+import tracemalloc
+
+from benchmarks import fixtures
+from preprocess import preprocess, iter_preprocess
+
+
+def legacy_preprocess(lista_discursos: list) -> list:
+    '''The preprocessing before the compiled engine'''
+    discursos = [discurso.replace("\r\n", "\n")
+                 for discurso in lista_discursos]
+    discursos = [re.sub(r"\b[A-Z]+(?:\s+[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ'.]+)*\s\([\s\w\-\./]+\)\s\-\s|\b[A-Z]+(?:\s+[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ'.]+)*\s\([\w\s]+\.\s\w+\s\-\s\w+\)\s\-\s",
+                        "", discurso)
+                 for discurso in discursos]
+    discursos = [re.sub(r"\b[Ss]r[as]*\.", "", discurso)
+                 for discurso in discursos]
+    discursos = [re.sub(r"\d+(?:[.,]\d+)*", "", discurso)
+                 for discurso in discursos]
+    return discursos
+
+
+def measure(name: str, function, discursos: list[str]):
+    '''Times a preprocessing function and its peak of allocated memory'''
+    tracemalloc.start()
+    init_time = time.perf_counter()
+    result = function(discursos)
+    elapsed = time.perf_counter() - init_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>10}: {elapsed:7.3f} s, "
+          f"{len(discursos) / elapsed:9.0f} speeches/s, "
+          f"peak {peak / 1e6:8.1f} MB")
+    return result
+
+
+def main():
+    '''Runs the benchmark on a synthetic legislature of speeches'''
+    # A legislature has tens of thousands of speeches on the API
+    n_speeches = 20000
+    n_words = 400
+    discursos = fixtures.corpus(n_speeches, n_words)
+    print(f"{n_speeches} speeches of about {n_words} words")
+    legacy = measure("before", legacy_preprocess, discursos)
+    compiled = measure("after", preprocess, discursos)
+    # Streaming only keeps one speech at a time,
+    # here the speeches are consumed counting their size
+    measure("generator",
+            lambda discursos_: sum(len(discurso) for discurso
+                                   in iter_preprocess(discursos_)),
+            discursos)
+    assert legacy == compiled
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+'''Regression benchmark of the stop words and punctuation removal.
+
+Compares the removal used before, which emitted one growing string per
+token of each speech, with Processer.remove_stop_words_punct, measuring
+the size of the corpus given to the vectorizer and its fit time.
+
+Run it from the root of the repository:
+
+    python -m benchmarks.bench_stop_words
+'''
+
+import string
+import time
+
+import sklearn.feature_extraction.text as sklearntext
+
+from benchmarks import fixtures
+from processer import Processer
+
+
+def legacy_remove_stop_words_punct(discursos: list[list[str]],
+                                   stop_words: set[str]) -> list[str]:
+    '''The removal before the fix, with the join inside the token loop'''
+    novos_discursos = []
+    for discurso in discursos:
+        novo_discurso = []
+        for token in discurso:
+            if ((token not in string.punctuation)
+                    and (token not in stop_words)):
+                novo_discurso.append(token)
+            novo_discurso_str = " ".join(novo_discurso)
+            novos_discursos.append(novo_discurso_str)
+    return novos_discursos
+
+
+def measure(name: str, remove, discursos: list[list[str]]) -> list[str]:
+    '''Times the removal and the vectorizer fit over its output'''
+    init_time = time.perf_counter()
+    treated = remove(discursos)
+    remove_time = time.perf_counter() - init_time
+
+    init_time = time.perf_counter()
+    sklearntext.CountVectorizer(analyzer="word",
+                                lowercase=True).fit_transform(treated)
+    fit_time = time.perf_counter() - init_time
+
+    print(f"{name:>8}: {len(treated):>7} documents, "
+          f"{sum(len(texto) for texto in treated) / 1e6:>8.2f} M chars, "
+          f"removal {remove_time:7.3f} s, fit {fit_time:7.3f} s")
+    return treated
+
+
+def main():
+    '''Runs the benchmark on a fixture of long speeches'''
+    n_speeches = 40
+    n_words = 1000
+    discursos = fixtures.tokenized_corpus(n_speeches, n_words)
+    processer = Processer([])
+    print(f"{n_speeches} speeches of {n_words} tokens")
+    legacy = measure("before",
+                     lambda discursos_: legacy_remove_stop_words_punct(
+                         discursos_, processer.stop_words),
+                     discursos)
+    fixed = measure("after", processer.remove_stop_words_punct, discursos)
+    # The last string emitted for each speech was the complete one
+    assert legacy[n_words - 1::n_words] == fixed
+
+
+if __name__ == "__main__":
+    main()
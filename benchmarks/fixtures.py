@@ -0,0 +1,90 @@
+'''Synthetic Portuguese speeches used by the benchmarks.
+
+The speeches imitate the transcriptions of the API: a speaker header,
+forms of address, numbers and punctuation, built from a fixed vocabulary
+with a seeded random generator, so every run uses the same corpus.'''
+
+import random
+
+WORDS = """
+educação saúde segurança pública trabalho emprego renda economia inflação
+juros imposto reforma tributária previdência aposentadoria salário mínimo
+governo federal estado município prefeito governador ministro presidente
+deputado senador câmara congresso comissão projeto lei emenda medida
+provisória votação plenário sessão orçamento recurso verba investimento
+escola universidade professor aluno hospital médico vacina pandemia
+vírus doença família criança jovem mulher idoso trabalhador empresário
+agricultura agronegócio produtor rural meio ambiente floresta amazônia
+desmatamento água energia petróleo combustível preço gasolina transporte
+estrada ferrovia porto cidade povo brasileiro brasil país nação democracia
+liberdade direito constituição justiça corrupção polícia crime violência
+arma fronteira defesa cultura esporte turismo ciência tecnologia internet
+defender aprovar votar discutir apresentar garantir combater investir
+reduzir aumentar criar ampliar melhorar fortalecer proteger cuidar
+importante fundamental necessário grande pequeno novo histórico social
+nacional regional popular público privado justo forte urgente
+hoje ontem amanhã sempre nunca muito pouco ainda também apenas
+""".split()
+
+STOP_WORDS = """
+o a os as de da do das dos em no na nos nas um uma uns umas e ou que
+para por com sem sobre entre mas como mais menos já não sim se ao à
+este esta isso aquele nosso nossa seu sua eles elas nós vós ele ela
+""".split()
+
+PUNCTUATION = [",", ",", ",", ".", ".", ";", ":", "!", "?", "(", ")", "-"]
+
+NAMES = ["JOÃO SILVA", "MARIA SOUZA", "ANA LIMA", "CARLOS ALMEIDA",
+         "PAULO ROCHA", "FERNANDA COSTA", "JOSÉ PEREIRA", "LUCIA MARTINS"]
+PARTIES = ["PT", "PL", "PSOL", "NOVO", "MDB", "PSD", "PP", "REDE"]
+STATES = ["SP", "RJ", "MG", "BA", "RS", "PE", "PR", "AM"]
+
+
+def speech_tokens(rng: random.Random, n_words: int) -> list[str]:
+    """Returns the tokens of a synthetic speech with n_words words,
+    mixing vocabulary, stop words and punctuation."""
+    tokens = []
+    for _ in range(n_words):
+        draw = rng.random()
+        if draw < 0.35:
+            tokens.append(rng.choice(STOP_WORDS))
+        elif draw < 0.45:
+            tokens.append(rng.choice(PUNCTUATION))
+        else:
+            tokens.append(rng.choice(WORDS))
+    return tokens
+
+
+def speech(rng: random.Random, n_words: int) -> str:
+    """Returns a synthetic transcription with about n_words words"""
+    header = (f"O SR. {rng.choice(NAMES)} ({rng.choice(PARTIES)} - "
+              f"{rng.choice(STATES)}. Pronuncia o seguinte discurso.) - ")
+    sentences = []
+    remaining = n_words
+    while remaining > 0:
+        size = min(remaining, rng.randint(8, 25))
+        words = [rng.choice(STOP_WORDS) if rng.random() < 0.35
+                 else rng.choice(WORDS) for _ in range(size)]
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words)),
+                         f"{rng.randint(1, 2000)},{rng.randint(0, 99)}")
+        if rng.random() < 0.15:
+            words.insert(0, rng.choice(["Sr. Presidente,", "Sras. Deputadas,",
+                                        "Srs. Deputados,"]))
+        sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        remaining -= size
+    return header + "\r\n".join(sentences)
+
+
+def corpus(n_speeches: int, n_words: int, seed: int = 0) -> list[str]:
+    """Returns n_speeches synthetic transcriptions of about n_words words"""
+    rng = random.Random(seed)
+    return [speech(rng, n_words) for _ in range(n_speeches)]
+
+
+def tokenized_corpus(n_speeches: int,
+                     n_words: int,
+                     seed: int = 0) -> list[list[str]]:
+    """Returns n_speeches tokenized speeches of n_words tokens each"""
+    rng = random.Random(seed)
+    return [speech_tokens(rng, n_words) for _ in range(n_speeches)]
@@ -0,0 +1,121 @@
+'''Benchmark of the whole pipeline, from the speeches to the graph.
+
+Each stage runs over synthetic corpora of several sizes, measuring its
+wall time and its peak of allocated memory with tracemalloc:
+
+1. preprocess
+2. Processer.process_text (needs the spaCy model and the NLTK data)
+3. BowLda.data_vectorizer
+4. BowLda.topic_extraction
+5. Converter.convert_to_edge_list of the topics of every party
+6. layout of the weighted graph of all parties, summed by GraphAccumulator,
+   with the backend of --layout-backend
+
+Run it from the root of the repository:
+
+    python -m benchmarks.pipeline --sizes small medium --output bench.csv
+'''
+
+import argparse
+import pathlib
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks import fixtures
+from converte_rede import converte_rede as cr
+from converte_rede import layout as graph_layout
+from extractors_class import BowLda
+from preprocess import preprocess
+from processer import Processer
+
+# Number of parties, speeches of each party and words of each speech
+SIZES = {"small": (2, 50, 300),
+         "medium": (4, 250, 300),
+         "large": (8, 1000, 300)}
+
+
+def measure(results: list[dict], size: str, stage: str, function,
+            *args, **kwargs):
+    '''Runs a stage, saving its time and peak of memory on results'''
+    tracemalloc.start()
+    init_time = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - init_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append({"size": size,
+                    "stage": stage,
+                    "seconds": elapsed,
+                    "peak_memory": peak / 1e6})
+    print(f"{size:>8} {stage:>22}: {elapsed:9.3f} s, "
+          f"peak {peak / 1e6:9.1f} MB")
+    return result
+
+
+def layout(converters: list[cr.Converter], backend: str = "auto") -> dict:
+    '''Layout of the graph of all parties, as converte_rede.main.
+
+    The edges of every party are summed by GraphAccumulator, so the layout
+    receives the same weighted graph. The LayoutCache is not used,
+    so every run measures the computation of the layout.'''
+    accumulator = cr.GraphAccumulator()
+    for converter in converters:
+        accumulator.add(converter)
+    return graph_layout.compute_layout(accumulator.to_networkx(),
+                                       backend=backend, k=3,
+                                       iterations=50, seed=0)
+
+
+def run(size: str, n_components: int = 10, n_words: int = 15,
+        n_jobs: int = 1, layout_backend: str = "auto") -> list[dict]:
+    '''Runs every stage over the corpus of a size of SIZES'''
+    n_parties, n_speeches, speech_words = SIZES[size]
+    partidos = fixtures.PARTIES[:n_parties]
+    discursos = [fixtures.corpus(n_speeches, speech_words, seed=i)
+                 for i in range(n_parties)]
+    results: list[dict] = []
+
+    preprocessed = measure(results, size, "preprocess",
+                           lambda: [preprocess(discursos_)
+                                    for discursos_ in discursos])
+    text_processer = Processer(preprocessed)
+    lda = BowLda(discursos, partidos, n_components,
+                 text_processer=text_processer)
+    measure(results, size, "process_text", lda.process_text)
+    measure(results, size, "data_vectorizer", lda.data_vectorizer)
+    measure(results, size, "topic_extraction", lda.topic_extraction,
+            n_words, n_jobs=n_jobs)
+    converters = measure(results, size, "convert_to_edge_list",
+                         lambda: [cr.Converter().convert_to_edge_list(topics)
+                                  for topics in lda.topics_keywords])
+    measure(results, size, "layout", layout, converters, layout_backend)
+    return results
+
+
+def main():
+    '''Runs the benchmark on the sizes given on the command line'''
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES),
+                        default=["small", "medium"])
+    parser.add_argument("--n-components", type=int, default=10)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--layout-backend", default="auto",
+                        choices=["auto"] + graph_layout.BACKENDS)
+    parser.add_argument("--output", type=pathlib.Path,
+                        help="CSV file where the results are saved")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(run(size, n_components=args.n_components,
+                           n_jobs=args.n_jobs,
+                           layout_backend=args.layout_backend))
+    df = pd.DataFrame(results)
+    if args.output is not None:
+        df.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
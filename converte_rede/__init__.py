@@ -0,0 +1,4 @@
+'''Package that converts the extracted topics to graphs.
+
+Its modules are run from the root of the repository, as
+python -m converte_rede.converte_rede'''
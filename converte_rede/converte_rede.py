@@ -1,11 +1,16 @@
 '''Implements transformations from the topics CSV to networkx implementation
 This module also implements functions to create some kinds of different graphs
 '''
+import heapq
 import pathlib
 import networkx as nx
+import numpy as np
 import pandas as pd
+from scipy import sparse
 import matplotlib.pyplot as plt
 
+from converte_rede.layout_cache import LayoutCache
+
 
 class Converter():
     '''This class converts the topics CSV to a Networkx graph.'''
@@ -13,10 +18,12 @@ class Converter():
         """This initializer instanciate a clean converter,
         without topics,
         without edgelist or any other object internally"""
-        self.topics: pd.DataFrame
-        self.edgelist: pd.DataFrame
+        self.topics: pd.DataFrame | None = None
+        self.edgelist: pd.DataFrame | None = None
         self.G = None
         self.palavras: set[str]
+        self.vocabulary: np.ndarray
+        self.cooccurrence: sparse.csr_matrix
 
     def set_topics(self, topics: pd.DataFrame) -> None:
         '''This method is to set the topics'''
@@ -42,33 +49,35 @@ class Converter():
                                      set the edgelist in this function")
         if topicos is not None:
             self.set_topics(topicos)
-        topics = self.topics.values.tolist()
-        topics = [sorted(topico) for topico in topics]
+        # Each word receives an integer id, in the sorted order of the words
+        vocabulary, codes = np.unique(self.topics.to_numpy(dtype=object),
+                                      return_inverse=True)
+        codes = codes.reshape(self.topics.shape)
 
         # É necessária a ordenação para evitar uma aresta A-B aparecer como B-A
         # Fazendo com que seja possível a realização de contagem de arestas
-
-        edgelist = []
-        for linha in topics:
-            for i, palavra in enumerate(linha):
-                for palavra_ in linha[i+1:len(linha)]:
-                    edgelist.append([palavra, palavra_])
-        df_edgelist = pd.DataFrame(edgelist)
-        df_edgelist.columns = pd.Index(["From", "To"])
-
-        df_edgelist = df_edgelist.groupby(df_edgelist.columns.tolist(),
-                                          as_index=False).size()
-        # Agrupates the equal elements(edges) and
-        # Creates a column with the repetition counting
-        # Prepare the code for creating a weighted graph
-        # The type is not wrong, once the groupby can return a Dataframe
-
-        unique_words = set()
-
-        unique_words.update(df_edgelist["From"].unique().tolist())
-        unique_words.update(df_edgelist["To"].unique().tolist())
-
-        self.palavras = unique_words
+        codes.sort(axis=1)
+
+        # Every pair of positions i < j of a topic, for all topics at once
+        i, j = np.triu_indices(codes.shape[1], k=1)
+        origins = codes[:, i].ravel()
+        destinations = codes[:, j].ravel()
+
+        # Repeated edges are summed by the sparse matrix, which is the
+        # weighted co-occurrence of the words
+        cooccurrence = sparse.coo_matrix(
+            (np.ones(len(origins), dtype=np.int64), (origins, destinations)),
+            shape=(len(vocabulary), len(vocabulary))).tocsr()
+        cooccurrence.sum_duplicates()
+        rows, columns = cooccurrence.nonzero()
+        # The rows and columns are sorted like the groupby of the edges
+        df_edgelist = pd.DataFrame({"From": vocabulary[rows],
+                                    "To": vocabulary[columns],
+                                    "size": cooccurrence.data})
+
+        self.palavras = set(vocabulary[np.union1d(rows, columns)].tolist())
+        self.vocabulary = vocabulary
+        self.cooccurrence = cooccurrence
         self.edgelist = df_edgelist
         return self
 
@@ -87,13 +96,249 @@ class Converter():
         self.G = G
         return G
 
+    def export(self, path: pathlib.Path | str,
+               polarity: float | None = None,
+               pos: dict | None = None,
+               formats: list[str] | None = None) -> list[pathlib.Path]:
+        '''Exports the weighted graph of the topics with export_graph,
+        after convert_to_edge_list.
+
+        With a polarity, it is the polarity attribute of every word.'''
+        return GraphAccumulator().add(self, polarity).export(path, pos,
+                                                             formats)
+
+
+class GraphAccumulator():
+    '''This class sums the edges of many topic files in a single graph.
+
+    Each word receives a global index, and the weights of the edges are
+    summed on a scipy.sparse adjacency matrix, replacing the concatenation
+    and groupby of all the edge lists. The networkx graph is only created
+    by to_networkx.
+
+    The polarity of each word is the mean of the polarities of the files
+    where it appears, as in main.'''
+    def __init__(self) -> None:
+        self.index: dict[str, int] = {}
+        self.words: list[str] = []
+        self.__rows: list[np.ndarray] = []
+        self.__columns: list[np.ndarray] = []
+        self.__weights: list[np.ndarray] = []
+        self.__polarity_sum: list[float] = []
+        self.__polarity_count: list[int] = []
+
+    def __word_id(self, word: str) -> int:
+        if word not in self.index:
+            self.index[word] = len(self.words)
+            self.words.append(word)
+            self.__polarity_sum.append(0.0)
+            self.__polarity_count.append(0)
+        return self.index[word]
+
+    def add(self, converter: Converter,
+            polarity: float | None = None) -> "GraphAccumulator":
+        '''Adds the edges of a converter, after convert_to_edge_list.
+
+        With a polarity, it is counted for each word of the converter.'''
+        ids = np.fromiter((self.__word_id(word)
+                           for word in converter.vocabulary.tolist()),
+                          dtype=np.int64, count=len(converter.vocabulary))
+        cooccurrence = converter.cooccurrence.tocoo()
+        # The words of an edge keep their sorted order with the global ids
+        self.__rows.append(ids[cooccurrence.row])
+        self.__columns.append(ids[cooccurrence.col])
+        self.__weights.append(cooccurrence.data)
+        if polarity is not None:
+            for palavra in converter.palavras:
+                i = self.index[palavra]
+                self.__polarity_sum[i] += polarity
+                self.__polarity_count[i] += 1
+        return self
+
+    @property
+    def adjacency(self) -> sparse.csr_matrix:
+        '''The summed weights of the edges, indexed as words'''
+        n_words = len(self.words)
+        if not self.__rows:
+            return sparse.csr_matrix((n_words, n_words), dtype=np.int64)
+        adjacency = sparse.coo_matrix(
+            (np.concatenate(self.__weights),
+             (np.concatenate(self.__rows), np.concatenate(self.__columns))),
+            shape=(n_words, n_words)).tocsr()
+        adjacency.sum_duplicates()
+        # Keeps only the summed edges, so the next files are added to them
+        summed = adjacency.tocoo()
+        self.__rows = [summed.row.astype(np.int64)]
+        self.__columns = [summed.col.astype(np.int64)]
+        self.__weights = [summed.data]
+        return adjacency
+
+    def edgelist(self) -> pd.DataFrame:
+        '''Returns the edges with the columns From, To and weight,
+        in the order of the groupby of the edge lists'''
+        adjacency = self.adjacency
+        rows, columns = adjacency.nonzero()
+        words = np.array(self.words, dtype=object)
+        edgelist = pd.DataFrame({"From": words[rows],
+                                 "To": words[columns],
+                                 "weight": adjacency.data})
+        return edgelist.sort_values(["From", "To"], ignore_index=True)
+
+    def polarities(self) -> pd.Series:
+        '''Returns the mean polarity of each word, NaN for the words
+        added without polarity'''
+        polarity_sum = np.array(self.__polarity_sum)
+        polarity_count = np.array(self.__polarity_count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = polarity_sum / polarity_count
+        return pd.Series(means, index=pd.Index(self.words, name="Palavra"),
+                         name="Peso")
+
+    def to_networkx(self) -> nx.Graph:
+        '''Creates the weighted networkX graph of the summed edges'''
+        return nx.from_pandas_edgelist(self.edgelist(), "From", "To",
+                                       edge_attr="weight")
+
+    def export(self, path: pathlib.Path | str,
+               pos: dict | None = None,
+               formats: list[str] | None = None) -> list[pathlib.Path]:
+        '''Exports the summed graph with export_graph,
+        with the mean polarity of each word'''
+        return export_graph(self.to_networkx(), path,
+                            polarities=self.polarities(), pos=pos,
+                            formats=formats)
+
+
+EXPORT_FORMATS = ["parquet", "gexf", "graphml"]
+
+
+def export_graph(G: nx.Graph, path: pathlib.Path | str,
+                 polarities: pd.Series | None = None,
+                 pos: dict | None = None,
+                 formats: list[str] | None = None) -> list[pathlib.Path]:
+    '''Exports a weighted graph to the folder path.
+
+    Parameters:
+        polarities: Polarity of the words, saved as the polarity attribute
+            of the nodes. NaN polarities are left out of the attributes.
+        pos: Positions of the nodes, saved as the x and y attributes.
+        formats: Some of EXPORT_FORMATS, all of them by default.
+            parquet writes edges.parquet, with From, To and weight,
+            and nodes.parquet, with one row for each word.
+            gexf and graphml write graph.gexf and graph.graphml.
+    Returns:
+        The files written.'''
+    formats = EXPORT_FORMATS if formats is None else formats
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"unknown formats {sorted(unknown)}, "
+                         f"use {EXPORT_FORMATS}")
+    path = pathlib.Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    nodes = pd.DataFrame({
+        "Palavra": list(G),
+        "degree": [degree for _, degree in G.degree()],
+        "weighted_degree": [degree for _, degree in G.degree(weight="weight")]
+        })
+    if polarities is not None:
+        nodes["polarity"] = polarities.reindex(nodes["Palavra"]).to_numpy()
+    if pos is not None:
+        positions = np.array([pos[node] for node in G]).reshape(-1, 2)
+        nodes["x"], nodes["y"] = positions[:, 0], positions[:, 1]
+
+    written = []
+    if "parquet" in formats:
+        edges = nx.to_pandas_edgelist(G, "From", "To")
+        edges.to_parquet(path.joinpath("edges.parquet"), index=False)
+        nodes.to_parquet(path.joinpath("nodes.parquet"), index=False)
+        written += [path.joinpath("edges.parquet"),
+                    path.joinpath("nodes.parquet")]
+    if "gexf" in formats or "graphml" in formats:
+        H = G.copy()
+        for row in nodes.to_dict("records"):
+            attributes = H.nodes[row.pop("Palavra")]
+            attributes.update({name: value for name, value in row.items()
+                               if not pd.isna(value)})
+        if "graphml" in formats:
+            nx.write_graphml(H, path.joinpath("graph.graphml"))
+            written.append(path.joinpath("graph.graphml"))
+        if "gexf" in formats:
+            if pos is not None:
+                # Positions that Gephi reads as the layout of the graph
+                for node, attributes in H.nodes(data=True):
+                    attributes["viz"] = {"position": {"x": attributes["x"],
+                                                      "y": attributes["y"],
+                                                      "z": 0.0}}
+            nx.write_gexf(H, path.joinpath("graph.gexf"))
+            written.append(path.joinpath("graph.gexf"))
+    return written
+
+
+def top_subgraph(G: nx.Graph, n_edges: int) -> nx.Graph:
+    '''Returns the subgraph of the n_edges edges with the largest weights'''
+    edges = heapq.nlargest(n_edges, G.edges(data="weight", default=1),
+                           key=lambda edge: edge[2])
+    return G.edge_subgraph((u, v) for u, v, _ in edges)
+
+
+def draw_levels(G: nx.Graph, pos: dict, path: pathlib.Path | str,
+                levels: list[int] | None = None,
+                node_color: dict | None = None,
+                **draw_options) -> list[pathlib.Path]:
+    '''Draws level of detail views of G, one file for each level.
+
+    Each view draws only the top_subgraph with the number of edges of
+    the level, on the positions of the whole graph, so the views can be
+    compared. They are saved next to path, as big_graph_top100.pdf
+    for path big_graph.pdf and level 100.
+
+    Parameters:
+        node_color: Value of the color of each node of G, used with cmap.
+            The color map spans the values of all the nodes of G,
+            so a value has the same color on every view.
+        draw_options: Options of nx.draw, replacing the defaults.
+    Returns:
+        The files written.'''
+    path = pathlib.Path(path)
+    levels = [100, 500, 2000] if levels is None else levels
+    options = {"with_labels": True,
+               "edge_color": "gainsboro",
+               "width": 0.2,
+               "node_size": 6,
+               "font_size": 3}
+    if node_color is not None:
+        options["vmin"] = min(node_color.values())
+        options["vmax"] = max(node_color.values())
+    options.update(draw_options)
+    written = []
+    for level in levels:
+        H = top_subgraph(G, level)
+        fig, ax = plt.subplots()
+        if node_color is not None:
+            options["node_color"] = [node_color[node] for node in H]
+        nx.draw(H, pos={node: pos[node] for node in H}, ax=ax, **options)
+        file = path.with_name(f"{path.stem}_top{level}{path.suffix}")
+        fig.savefig(file)
+        plt.close(fig)
+        written.append(file)
+    return written
+
+
+def read_polarities(path: pathlib.Path | str = "./polarities_pos.txt"
+                    ) -> list[int]:
+    '''Reads the polarity of each topic file,
+    the second column of each line of path'''
+    lines = pathlib.Path(path).read_text("utf-8").splitlines()
+    return [int(line.split()[1]) for line in lines]
+
 
 def create_big_graph(graphs: list[nx.Graph]):
     '''Sums up all networkX graphs making a unified graph'''
-    G = nx.Graph()
-    for graph in graphs:
-        G = nx.compose(G.copy(), graph)
-    return G
+    if not graphs:
+        return nx.Graph()
+    # compose_all builds the graph once, instead of copying it for each graph
+    return nx.compose_all(graphs)
 
 
 def main_partido():
@@ -102,14 +347,7 @@ def main_partido():
     topics = pd.read_csv(file_path)
     converter = Converter().convert_to_edge_list(topics)
 
-    edge_list = converter.edgelist
-    agg_fun = {"size": "sum"}
-    edge_list = edge_list.groupby(edge_list.columns.tolist(),
-                                  as_index=False).aggregate(agg_fun)
-
-    edge_list.columns = ["From", "To", "weight"]
-
-    G = nx.from_pandas_edgelist(edge_list, "From", "To", edge_attr="weight")
+    G = GraphAccumulator().add(converter).to_networkx()
 
     pos = nx.layout.spring_layout(G, k=0.5)
 
@@ -130,22 +368,15 @@ def main_orientacao():
     Receives a folder of .csv files.'''
     files_path = list(pathlib.Path("./topics/lda/legis56/oposição/").iterdir())
 
-    files = [pd.read_csv(file) for file in files_path]
-    converters = [Converter().convert_to_edge_list(topicos)
-                  for topicos in files]
-
-    edge_list = [converter.edgelist for converter in converters]
-    edge_list = pd.concat(edge_list)
-    agg_fun = {"size": "sum"}
-    edge_list = edge_list.groupby(edge_list.columns.tolist(),
-                                  as_index=False).aggregate(agg_fun)
-    # Sum repeating edges summing "size" column
+    accumulator = GraphAccumulator()
+    for file in files_path:
+        # Sum repeating edges of all the files
+        accumulator.add(Converter().convert_to_edge_list(pd.read_csv(file)))
 
-    edge_list.columns = ["From", "To", "weight"]
-
-    G = nx.from_pandas_edgelist(edge_list, "From", "To", edge_attr="weight")
+    G = accumulator.to_networkx()
 
     pos = nx.layout.spring_layout(G=G, iterations=25, k=0.2, scale=2)
+    accumulator.export("./graphs/grafo_oposição", pos=pos)
 
     nx.draw(G,
             pos=pos,
@@ -155,46 +386,32 @@ def main_orientacao():
             width=0.1,
             with_labels=True)
     plt.savefig("grafo_oposição.pdf")
+    draw_levels(G, pos, "grafo_oposição.pdf")
 
 
 def main():
     '''Creates a graph of all parties.
     Coloring righty terms on blue hue and lefty terms on red hue'''
     files_path = list(pathlib.Path("./topics/lda/pos_pandemia").iterdir())
-    polarities = pathlib.Path(
-        "./polarities_pos.txt").read_text("utf-8").splitlines()
-    polarities = [-1*int(polarity.split()[1])
-                  for polarity in polarities]
-    # Inverts the colors on the graph, making it more intuitive
-
-    files = [pd.read_csv(file) for file in files_path]
-    converters = [Converter().convert_to_edge_list(topicos)
-                  for topicos in files]
+    polarities = read_polarities()
 
-    # Calculate edge_weight total
-    edge_list = [converter.edgelist for converter in converters]
-    edge_list = pd.concat(edge_list)
-    agg_fun = {"size": "sum"}
-    edge_list = edge_list.groupby(edge_list.columns.tolist(),
-                                  as_index=False).aggregate(agg_fun)
+    # Calculate edge_weight total and the mean polarity of each word
+    accumulator = GraphAccumulator()
+    for i, file in enumerate(files_path):
+        accumulator.add(Converter().convert_to_edge_list(pd.read_csv(file)),
+                        polarity=polarities[i])
 
-    word_list = []
-    for i, converter in enumerate(converters):
-        for palavra in list(converter.palavras):
-            word_list.append([palavra, polarities[i]])
+    G = accumulator.to_networkx()
+    words_unique = accumulator.polarities().reindex(G.nodes())
 
-    df_word_list = pd.DataFrame(word_list, columns=["Palavra", "Peso"])
-    aggregate_fun = {"Peso": "mean"}
-    words_unique = df_word_list.groupby("Palavra").aggregate(aggregate_fun)
-    edge_list.columns = ["From", "To", "weight"]
-
-    G = nx.from_pandas_edgelist(edge_list, "From", "To", edge_attr="weight")
-    words_unique = words_unique.reindex(G.nodes())
-
-    pos = nx.layout.spring_layout(G, k=3, iterations=1000, threshold=1e-6)
+    pos = LayoutCache().layout(G, iterations=1000, k=3)
+    # The positions are reused while the graph does not change
+    accumulator.export("./graphs/big_graph", pos=pos)
 
+    colors = (-words_unique).astype(int)
+    # Inverts the colors on the graph, making it more intuitive
     nx.draw(G, with_labels=True,
-            node_color=words_unique["Peso"].astype(int),
+            node_color=colors,
             cmap=plt.cm.coolwarm,
             width=0.001,
             edge_color="gainsboro",
@@ -203,6 +420,8 @@ def main():
             pos=pos)
 
     plt.savefig("big_graph.pdf")
+    draw_levels(G, pos, "big_graph.pdf", node_color=colors.to_dict(),
+                cmap=plt.cm.coolwarm)
 
 
 if __name__ == "__main__":
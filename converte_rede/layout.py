@@ -0,0 +1,217 @@
+'''This module computes the positions of the nodes of the topic graphs.
+
+nx.spring_layout computes the repulsion between every pair of nodes on a
+dense matrix, taking a long time on the graphs of all parties.
+The backends of compute_layout are:
+
+igraph: Fruchterman-Reingold of igraph, which approximates the
+    repulsion with a grid on graphs with 1000 nodes or more
+numpy: Fruchterman-Reingold vectorized with NumPy, computing the
+    repulsion in chunks of nodes with matrix products,
+    used when igraph is not installed
+networkx: nx.spring_layout, the original layout
+
+All of them start from positions drawn from seed, so the same graph
+always receives the same layout. They can also be warm started from the
+positions of a previous layout, see layout_cache.py.'''
+
+import random
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
+
+BACKENDS = ["igraph", "numpy", "networkx"]
+VERSION = 2
+# Saved by LayoutCache with the parameters, changing when the positions
+# computed with the same parameters change
+CHUNK_ELEMENTS = 2 ** 20
+# Number of distances computed at once by the NumPy backend
+
+
+def compute_layout(G: nx.Graph,
+                   backend: str = "auto",
+                   iterations: int = 50,
+                   seed: int = 0,
+                   k: float | None = None,
+                   weight: str | None = "weight",
+                   scale: float = 1,
+                   pos: dict | None = None,
+                   start_temperature: float | None = None) -> dict:
+    '''Computes the positions of the nodes of G.
+
+    Parameters:
+        backend: One of BACKENDS, or auto to use igraph when it is
+            installed and numpy otherwise.
+        iterations: Number of iterations of the force-directed algorithm.
+        seed: Seed of the initial positions.
+        k: Optimal distance between the nodes, as in nx.spring_layout,
+            on initial positions drawn from [0, 1]. None keeps the
+            default spacing of each backend.
+        weight: Edge attribute with the weights, None for unweighted edges.
+        scale: The positions are rescaled to [-scale, scale].
+        pos: Initial positions of some of the nodes. The other nodes start
+            near their neighbours with positions, or at random.
+        start_temperature: Largest movement of a node on the first
+            iteration, as a fraction of the size of the initial layout.
+            Small values keep a warm started layout close to pos.
+            The default is 0.1, or the default of igraph.
+    Returns:
+        A dict with the position of each node, as nx.spring_layout.'''
+    if backend == "auto":
+        backend = "igraph" if ig is not None else "numpy"
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be auto or one of {BACKENDS}")
+    if backend == "igraph" and ig is None:
+        raise ImportError("the igraph backend needs python-igraph")
+
+    nodes = list(G)
+    if not nodes:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges()],
+                     dtype=np.int64).reshape(-1, 2)
+    weights = np.array([1 if weight is None else data.get(weight, 1)
+                        for _, _, data in G.edges(data=True)], dtype=float)
+    rng = np.random.default_rng(seed)
+    initial = rng.random((len(nodes), 2))
+    if pos:
+        initial = _warm_positions(nodes, edges, pos, rng)
+    if backend == "igraph" and k is not None:
+        # The forces of igraph are the ones of k = 1, and the forces of
+        # any k are the same on the positions divided by k, so the layout
+        # starts from them with the temperature of the numpy backend
+        initial /= k
+        if start_temperature is None:
+            start_temperature = 0.1
+    elif backend == "igraph" and pos:
+        # igraph places the nodes on an area of side about sqrt(n)
+        initial *= np.sqrt(len(nodes))
+
+    if backend == "networkx":
+        if start_temperature is not None:
+            raise ValueError("start_temperature is not used by networkx")
+        return nx.spring_layout(G, k=k, iterations=iterations, seed=seed,
+                                weight=weight, scale=scale,
+                                pos=dict(zip(nodes, initial)) if pos else None)
+    if start_temperature is not None:
+        start_temperature *= max(np.ptp(initial, axis=0).max(), 1e-6)
+    if backend == "igraph":
+        positions = _igraph_layout(initial, edges, weights, iterations, seed,
+                                   start_temperature)
+    else:
+        positions = _numpy_layout(initial, edges, weights, iterations, k,
+                                  start_temperature)
+    return dict(zip(nodes, _rescale(positions, scale)))
+
+
+def _warm_positions(nodes: list, edges: np.ndarray, pos: dict,
+                    rng: np.random.Generator) -> np.ndarray:
+    '''Initial positions on [0, 1] taken from pos.
+    The nodes without position are placed near their neighbours'''
+    n_nodes = len(nodes)
+    placed = np.array([node in pos for node in nodes])
+    positions = rng.random((n_nodes, 2))
+    if not placed.any():
+        return positions
+    positions[placed] = [pos[node] for node, known in zip(nodes, placed)
+                         if known]
+    low = positions[placed].min(axis=0)
+    extent = max(np.ptp(positions[placed], axis=0).max(), 1e-6)
+    positions[placed] = (positions[placed] - low) / extent
+    jitter = 0.01
+    adjacency = sparse.coo_matrix(
+        (np.ones(len(edges)), (edges[:, 0], edges[:, 1])),
+        shape=(n_nodes, n_nodes)).tocsr()
+    adjacency = adjacency + adjacency.T
+    # Each pass places the nodes with neighbours already placed
+    # on the mean of their positions, so new components follow their edges
+    while True:
+        n_neighbours = adjacency @ placed.astype(float)
+        new = ~placed & (n_neighbours > 0)
+        if not new.any():
+            break
+        total = adjacency @ np.where(placed[:, None], positions, 0)
+        positions[new] = (total[new] / n_neighbours[new, None]
+                          + jitter * rng.standard_normal((new.sum(), 2)))
+        placed |= new
+    return positions
+
+
+def _igraph_layout(initial: np.ndarray, edges: np.ndarray,
+                   weights: np.ndarray, iterations: int, seed: int,
+                   start_temperature: float | None = None) -> np.ndarray:
+    graph = ig.Graph(n=len(initial), edges=edges.tolist())
+    options = {}
+    if start_temperature is not None:
+        options["start_temp"] = start_temperature
+    # igraph draws its random numbers from a generator set globally,
+    # so it is seeded during the layout and then restored
+    ig.set_random_number_generator(random.Random(seed))
+    try:
+        layout = graph.layout_fruchterman_reingold(
+            weights=weights.tolist(), niter=iterations,
+            seed=initial.tolist(), grid="auto", **options)
+    finally:
+        ig.set_random_number_generator(random)
+    return np.array(layout.coords, dtype=float)
+
+
+def _numpy_layout(initial: np.ndarray, edges: np.ndarray,
+                  weights: np.ndarray, iterations: int,
+                  k: float | None = None,
+                  start_temperature: float | None = None) -> np.ndarray:
+    '''Fruchterman-Reingold with the same forces of nx.spring_layout,
+    without its dense adjacency matrix'''
+    positions = initial.copy()
+    n_nodes = len(positions)
+    if k is None:
+        k = np.sqrt(1 / n_nodes)
+    rows, columns = edges[:, 0], edges[:, 1]
+    chunk_size = max(1, CHUNK_ELEMENTS // n_nodes)
+    # The temperature limits the movement and cools down linearly
+    temperature = (np.ptp(positions, axis=0).max() * 0.1
+                   if start_temperature is None else start_temperature)
+    cooling = temperature / (iterations + 1)
+    displacement = np.empty_like(positions)
+    for _ in range(iterations):
+        # Repulsion of every pair of nodes, k^2 / distance, as
+        # sum_j (x_i - x_j) w_ij = x_i sum_j w_ij - (W @ X)_i
+        squared_norms = np.einsum("ij,ij->i", positions, positions)
+        for start in range(0, n_nodes, chunk_size):
+            stop = start + chunk_size
+            chunk = positions[start:stop]
+            repulsion = chunk @ positions.T
+            repulsion *= -2
+            repulsion += squared_norms[start:stop, None]
+            repulsion += squared_norms[None, :]
+            np.clip(repulsion, 1e-4, None, out=repulsion)
+            np.divide(k * k, repulsion, out=repulsion)
+            displacement[start:stop] = (chunk * repulsion.sum(axis=1)[:, None]
+                                        - repulsion @ positions)
+        # Attraction of the edges, weight * distance^2 / k
+        delta = positions[rows] - positions[columns]
+        distance = np.clip(np.linalg.norm(delta, axis=-1), 0.01, None)
+        force = delta * (weights * distance / k)[:, None]
+        np.subtract.at(displacement, rows, force)
+        np.add.at(displacement, columns, force)
+
+        length = np.clip(np.linalg.norm(displacement, axis=-1), 0.01, None)
+        positions += displacement * (temperature / length)[:, None]
+        temperature -= cooling
+    return positions
+
+
+def _rescale(positions: np.ndarray, scale: float) -> np.ndarray:
+    '''Centers the positions and rescales them to [-scale, scale],
+    as nx.rescale_layout'''
+    positions = positions - positions.mean(axis=0)
+    limit = np.abs(positions).max()
+    if limit > 0:
+        positions *= scale / limit
+    return positions
@@ -0,0 +1,198 @@
+'''Module that keeps the layouts of the topic graphs on disk.
+
+This module contains the [LayoutCache] class.'''
+
+import hashlib
+import json
+import os
+import pathlib
+import time
+
+import networkx as nx
+import numpy as np
+
+from converte_rede import layout
+
+
+class LayoutCache():
+    """
+    This class saves the positions of the nodes of each graph.
+
+    A layout is addressed by the hash of the nodes, the weighted edges and
+    the parameters of compute_layout, so changing only the colors or the
+    fonts of a figure reuses the positions of the previous run.
+
+    A graph missing from the cache is warm started from the cached layout
+    with the same parameters sharing the most nodes with it, such as the
+    graph of all parties before the topics of a new party were added.
+    Changing a parameter computes a new layout from scratch.
+
+    The file index.json keeps the parameters and the last use of each
+    layout, so only the layouts with the same parameters are read, and
+    only the max_layouts most recently used are kept."""
+    def __init__(self,
+                 path: pathlib.Path | str = "./.cache/layouts",
+                 min_overlap: float = 0.5,
+                 max_layouts: int = 64) -> None:
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.min_overlap = min_overlap
+        self.max_layouts = max_layouts
+        self.index = self.__read_index()
+
+    def parameters_key(self, **parameters) -> str:
+        """Returns the hash of the parameters of compute_layout,
+        with the version of the layout module"""
+        parameters = dict(parameters, version=layout.VERSION)
+        return hashlib.sha256(json.dumps(parameters, sort_keys=True,
+                                         default=str).encode("utf-8")
+                              ).hexdigest()
+
+    def key(self, G: nx.Graph, **parameters) -> str:
+        """Returns the address of the layout of G with the parameters
+        of compute_layout"""
+        weight = parameters.get("weight", "weight")
+        hasher = hashlib.sha256()
+        hasher.update(self.parameters_key(**parameters).encode("utf-8"))
+        for node in sorted(map(str, G)):
+            hasher.update(f"\x1e{node}".encode("utf-8"))
+        edges = []
+        for u, v, data in G.edges(data=True):
+            u, v = sorted((str(u), str(v)))
+            value = 1 if weight is None else data.get(weight, 1)
+            edges.append(f"{u}\x1f{v}\x1f{value!r}")
+        for edge in sorted(edges):
+            hasher.update(f"\x1d{edge}".encode("utf-8"))
+        return hasher.hexdigest()
+
+    def __file(self, key: str) -> pathlib.Path:
+        return self.path.joinpath(f"{key}.npz")
+
+    def __read_index(self) -> dict[str, dict]:
+        index_file = self.path.joinpath("index.json")
+        try:
+            return json.loads(index_file.read_text("utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        # Without the index, it is rebuilt from the layouts on the folder
+        index = {}
+        for file in self.path.glob("*.npz"):
+            with np.load(file) as cached:
+                index[file.stem] = {"parameters": str(cached["parameters"]),
+                                    "used": file.stat().st_mtime}
+        return index
+
+    def __write(self, file: pathlib.Path, write) -> None:
+        # Writes a temporary file and replaces the original,
+        # so concurrent runs never read half of a file
+        temporary = file.with_name(f"{file.name}.{os.getpid()}"
+                                   f".{time.monotonic_ns()}.tmp")
+        with temporary.open("wb") as output:
+            write(output)
+        os.replace(temporary, file)
+
+    def __write_index(self) -> None:
+        content = json.dumps(self.index).encode("utf-8")
+        self.__write(self.path.joinpath("index.json"),
+                     lambda output: output.write(content))
+
+    def get(self, key: str) -> dict | None:
+        """Returns the cached positions of key, or None if missing"""
+        try:
+            with np.load(self.__file(key)) as file:
+                pos = dict(zip(file["nodes"].tolist(), file["positions"]))
+        except FileNotFoundError:
+            self.index.pop(key, None)
+            return None
+        if key in self.index:
+            self.index[key]["used"] = time.time()
+            self.__write_index()
+        return pos
+
+    def put(self, key: str, pos: dict, parameters_key: str) -> None:
+        """Saves the positions of a layout, addressed by key,
+        with the hash of its parameters"""
+        nodes = np.array([str(node) for node in pos], dtype=str)
+        positions = np.array(list(pos.values()), dtype=float)
+        self.__write(self.__file(key),
+                     lambda output: np.savez(output, nodes=nodes,
+                                             positions=positions,
+                                             parameters=parameters_key))
+        self.index[key] = {"parameters": parameters_key, "used": time.time()}
+        self.evict()
+        self.__write_index()
+
+    def evict(self) -> int:
+        """Removes the least recently used layouts over max_layouts,
+        returning how many were removed"""
+        by_use = sorted(self.index, key=lambda key: self.index[key]["used"])
+        removed = by_use[:max(0, len(by_use) - self.max_layouts)]
+        for key in removed:
+            self.__file(key).unlink(missing_ok=True)
+            del self.index[key]
+        return len(removed)
+
+    def nearest(self, G: nx.Graph, parameters_key: str) -> dict | None:
+        """Returns the cached layout with the parameters of parameters_key
+        sharing the most nodes with G, or None if none of them reaches
+        min_overlap.
+
+        The overlap is the Jaccard index of the sets of nodes."""
+        nodes = set(map(str, G))
+        best, best_overlap = None, self.min_overlap
+        for key, entry in self.index.items():
+            if entry["parameters"] != parameters_key:
+                continue
+            try:
+                with np.load(self.__file(key)) as cached:
+                    cached_nodes = set(cached["nodes"].tolist())
+            except FileNotFoundError:
+                continue
+            union = len(nodes | cached_nodes)
+            overlap = len(nodes & cached_nodes) / union if union else 0
+            if overlap >= best_overlap:
+                best, best_overlap = key, overlap
+        return None if best is None else self.get(best)
+
+    def layout(self, G: nx.Graph,
+               warm_iterations: int | None = None,
+               warm_temperature: float = 0.005,
+               **parameters) -> dict:
+        """Returns the layout of G, computing it only when it is missing.
+
+        Parameters:
+            parameters: Parameters of layout.compute_layout.
+            warm_iterations: Iterations of a layout warm started from
+                the nearest cached one, a fifth of iterations by default.
+            warm_temperature: start_temperature of a warm started layout.
+                A warm started layout is saved with the key of G,
+                so the next runs reuse it as it is.
+        Returns:
+            A dict with the position of each node, as nx.spring_layout."""
+        if parameters.get("backend", "auto") == "auto":
+            parameters["backend"] = ("igraph" if layout.ig is not None
+                                     else "numpy")
+        # The positions of different backends are not the same
+        parameters_key = self.parameters_key(**parameters)
+        key = self.key(G, **parameters)
+        pos = self.get(key)
+        if pos is not None:
+            return {node: pos[str(node)] for node in G}
+
+        nearest = self.nearest(G, parameters_key)
+        if nearest is not None:
+            iterations = parameters.get("iterations", 50)
+            warm = dict(parameters,
+                        iterations=(max(1, iterations // 5)
+                                    if warm_iterations is None
+                                    else warm_iterations))
+            if warm["backend"] != "networkx":
+                warm["start_temperature"] = warm_temperature
+            positions = layout.compute_layout(
+                G, pos={node: nearest[str(node)] for node in G
+                        if str(node) in nearest},
+                **warm)
+        else:
+            positions = layout.compute_layout(G, **parameters)
+        self.put(key, positions, parameters_key)
+        return positions
@@ -6,11 +6,11 @@ taking a long size to create the graph'''
 
 import pathlib
 import netgraph
-import networkx as nx
 import pandas as pd
 import matplotlib.pyplot as plt
 
-import converte_rede as cr
+from converte_rede import converte_rede as cr
+from converte_rede.layout_cache import LayoutCache
 
 
 def main():
@@ -20,36 +20,21 @@ def main():
     Para saber quais termos são mais utilizados pela esquerda e pela direita
     '''
     files_path = list(pathlib.Path("./topics/lda/pos_pandemia").iterdir())
-    polarities = pathlib.Path("./polarities_pos.txt"
-                              ).read_text("utf-8").splitlines()
-    polarities = [-1*int(polarity.split()[1]) for polarity in polarities]
+    polarities = cr.read_polarities()
+    # Calculate edge_weight total and the mean polarity of each word
+    accumulator = cr.GraphAccumulator()
+    for i, file in enumerate(files_path):
+        accumulator.add(
+            cr.Converter().convert_to_edge_list(pd.read_csv(file)),
+            polarity=polarities[i])
+
+    G = accumulator.to_networkx()
+
+    pos = LayoutCache().layout(G, iterations=1000, k=3)
+    # The positions are reused while the graph does not change
+    words_unique = accumulator.polarities().reindex(G.nodes())
+    words_unique_array = (-words_unique).astype(int).tolist()
     # Para que as cores fiquem corretas
-    files = [pd.read_csv(file) for file in files_path]
-    converters = [cr.Converter().convert_to_edge_list(topicos)
-                  for topicos in files]
-
-    # Calculate edge_weight total
-    edge_list = [converter.edgelist for converter in converters]
-    edge_list = pd.concat(edge_list)
-    agg_fun = {"size": "sum"}
-    edge_list = edge_list.groupby(edge_list.columns.tolist(),
-                                  as_index=False).aggregate(agg_fun)
-
-    word_list = []
-    for i, converter in enumerate(converters):
-        for palavra in list(converter.palavras):
-            word_list.append([palavra, polarities[i]])
-
-    df_word_list = pd.DataFrame(word_list, columns=["Palavra", "Peso"])
-    aggregate_fun = {"Peso": "mean"}
-    words_unique = df_word_list.groupby("Palavra").aggregate(aggregate_fun)
-    edge_list.columns = ["From", "To", "weight"]
-
-    G = nx.from_pandas_edgelist(edge_list, "From", "To", edge_attr="weight")
-
-    pos = nx.layout.spring_layout(G, k=3, iterations=1000, threshold=1e-5)
-    words_unique = words_unique.reindex(G.nodes())
-    words_unique_array = words_unique["Peso"].astype(int).tolist()
     cores = plt.cm.ScalarMappable(cmap=plt.cm.coolwarm
                                   ).to_rgba(words_unique_array)
     dicionario_cores = dict(zip(G.nodes(), cores))
@@ -66,6 +51,10 @@ def main():
                    node_layout=pos,
                    ax=ax)
     plt.savefig("netgraph_graph.pdf")
+    accumulator.export("./graphs/netgraph_graph", pos=pos)
+    cr.draw_levels(G, pos, "netgraph_graph.pdf",
+                   node_color=dict(zip(G.nodes(), words_unique_array)),
+                   cmap=plt.cm.coolwarm)
 
 
 def main_orientacao():
@@ -73,19 +62,13 @@ def main_orientacao():
     Não há coloração no grafo'''
     files_path = list(pathlib.Path("./topics/lda/legis56/oposição/").iterdir())
 
-    files = [pd.read_csv(file) for file in files_path]
-    converters = [cr.Converter().convert_to_edge_list(topicos)
-                  for topicos in files]
+    accumulator = cr.GraphAccumulator()
+    for file in files_path:
+        # Sum repeating edges of all the files
+        accumulator.add(
+            cr.Converter().convert_to_edge_list(pd.read_csv(file)))
 
-    edge_list = [converter.edgelist for converter in converters]
-    edge_list = pd.concat(edge_list)
-    agg_fun = {"size": "sum"}
-    edge_list = edge_list.groupby(edge_list.columns.tolist(),
-                                  as_index=False).aggregate(agg_fun)
-    # Sum repeating edges summing "size" column
-    edge_list.columns = ["From", "To", "weight"]
-
-    G = nx.from_pandas_edgelist(edge_list, "From", "To", edge_attr="weight")
+    G = accumulator.to_networkx()
 
     fig, ax = plt.subplots()
     netgraph.Graph(graph=G,
@@ -115,14 +98,7 @@ def main_partido():
     topics = pd.read_csv(file_path)
     converter = cr.Converter().convert_to_edge_list(topics)
 
-    edge_list = converter.edgelist
-    agg_fun = {"size": "sum"}
-    edge_list = edge_list.groupby(edge_list.columns.tolist(),
-                                  as_index=False).aggregate(agg_fun)
-
-    edge_list.columns = ["From", "To", "weight"]
-
-    G = nx.from_pandas_edgelist(edge_list, "From", "To", edge_attr="weight")
+    G = cr.GraphAccumulator().add(converter).to_networkx()
 
     fig, ax = plt.subplots()
     netgraph.Graph(graph=G,
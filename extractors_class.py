@@ -13,40 +13,247 @@ The classes to be used in this module are:
     Implements the PBG class to be used for topic extraction
 
     Implements the processing of the text using TF-IDF
+
+3. StreamingLda class
+
+    Implements LDA over a corpus read in chunks from the disk
+
+    Implements the processing of the text using BoW with a fixed vocabulary
 '''
 
+import os
+import functools
 import pathlib
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
 import pandas as pd
-import spacy
 import sklearn.feature_extraction.text as sklearntext
 import numpy as np
 from sklearn.decomposition import LatentDirichletAllocation
+import psutil
 
 import pbg
 
 from preprocess import preprocess
 import processer
-
-
-class Extractor():
+from leitura import ler_discursos, iter_discursos
+from lemma_cache import LemmaCache
+from instrumentation import Instrumentation
+
+
+def fit_lda(data_vectorized, n_components: int,
+            n_jobs: int = -1,
+            batch_size: int = 128) -> LatentDirichletAllocation:
+    """Fits the LDA model of a party.
+
+    It is a module function so it can be sent to the worker processes."""
+    lda_model = LatentDirichletAllocation(
+        learning_method="online",
+        random_state=100,
+        batch_size=batch_size,
+        evaluate_every=-1,
+        n_jobs=n_jobs,
+        n_components=n_components
+    )
+    # Applies the data to the model before saving it
+    # The result is not captured once it's not used
+    lda_model.fit_transform(data_vectorized)
+    return lda_model
+
+
+def fit_pbg(data_vectorized, feature_names, n_components: int,
+            n_words: int) -> tuple[pbg.PBG, np.ndarray]:
+    """Fits the PBG model of a party, returning it and the keywords of its
+    topics, given by get_topics.
+
+    It is a module function so it can be sent to the worker processes."""
+    pbg_model = pbg.PBG(n_components=n_components,
+                        feature_names=feature_names,
+                        save_interval=1)
+    pbg_model.fit(data_vectorized)
+    return pbg_model, np.array(pbg_model.get_topics(n_top_words=n_words))
+
+
+def top_keywords(components, feature_names,
+                 n_words: int = 20) -> tuple[np.ndarray, np.ndarray]:
+    """Selects the words of greater weight of every topic at once.
+
+    Parameters:
+        components: The topic-word matrix, one row for each topic.
+        feature_names: The word of each column.
+        n_words: Number of words of each topic.
+    Returns:
+        The keywords and their weights, both with a row for each topic,
+        ordered from the greatest weight."""
+    components = np.asarray(components)
+    n_words = min(n_words, components.shape[1])
+    # argpartition only separates the n_words greatest weights,
+    # then just them are sorted
+    top = np.argpartition(-components, n_words - 1, axis=1)[:, :n_words]
+    weights = np.take_along_axis(components, top, axis=1)
+    order = np.argsort(-weights, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    return (np.asarray(feature_names)[top],
+            np.take_along_axis(weights, order, axis=1))
+
+
+@functools.lru_cache()
+def _topic_labels(n_topics: int, n_words: int) -> tuple[pd.Index, pd.Index]:
+    return (pd.Index(["Topic " + str(i) for i in range(n_topics)]),
+            pd.Index(["Word " + str(i) for i in range(n_words)]))
+
+
+def topics_frame(values: np.ndarray) -> pd.DataFrame:
+    """Creates the DataFrame of the keywords or weights of the topics,
+    with the labels saved by to_csv"""
+    index, columns = _topic_labels(*np.shape(values))
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+def shared_vectorize(vectorizer: sklearntext.CountVectorizer,
+                     treated_discursos: list[list[str]]) -> tuple[list, list]:
+    """Vectorizes the speeches of every party with a single vocabulary.
+
+    The vectorizer is fitted once on the speeches of all parties, so each
+    speech is tokenized only once, and its matrix is split by party.
+    Every party gets the same columns, making the topics comparable.
+
+    Returns:
+        The matrix of each party and their feature names, the same
+        array for every party."""
+    matrix = vectorizer.fit_transform(
+        [discurso for discursos in treated_discursos
+         for discurso in discursos])
+    feature_names = vectorizer.get_feature_names_out()
+    data_vectorized = []
+    start = 0
+    for discursos in treated_discursos:
+        data_vectorized.append(matrix[start:start + len(discursos)])
+        start += len(discursos)
+    return data_vectorized, [feature_names] * len(treated_discursos)
+
+
+def _party_memory(data_vectorized, n_components: int) -> int:
+    """Estimates the memory, in bytes, used to fit the model of a party.
+
+    The matrix is counted a few times since the models copy it,
+    and the dense document-topic and topic-word arrays are counted
+    for the intermediate arrays of the fitting."""
+    matrix = sum(getattr(data_vectorized, array).nbytes
+                 for array in ("data", "indices", "indptr")
+                 if hasattr(data_vectorized, array))
+    n_docs, n_features = data_vectorized.shape
+    dense = (n_docs + n_features) * n_components * 8
+    return 4 * matrix + 4 * dense
+
+
+def max_workers(data_vectorized: list, n_components: int,
+                n_jobs: int = -1) -> int:
+    """Returns how many parties can be fitted at once.
+
+    Parameters:
+        data_vectorized: The vectorized speeches of each party.
+        n_components: The number of topics of the models.
+        n_jobs: The wanted number of processes, -1 uses every core.
+    Returns:
+        n_jobs capped by the number of parties and by how many of the
+        biggest parties fit on the available memory, at least 1."""
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(data_vectorized))
+    if n_jobs <= 1:
+        return 1
+    biggest = max(_party_memory(data, n_components)
+                  for data in data_vectorized)
+    available = psutil.virtual_memory().available
+    return max(1, min(n_jobs, available // max(biggest, 1)))
+
+
+class Persistent():
+    """Saves and loads fitted topic extractors.
+
+    Only the attributes in _saved_attributes are saved, as a joblib file
+    compressed with zlib: the vocabulary, the fitted models, the parties
+    and the topics, never the speeches."""
+    _saved_attributes: tuple[str, ...] = ()
+
+    def save(self, path: pathlib.Path | str) -> None:
+        """Saves the fitted extractor on the file path"""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {attribute: getattr(self, attribute)
+                 for attribute in self._saved_attributes
+                 if hasattr(self, attribute)}
+        joblib.dump({"class": type(self).__name__, "state": state},
+                    path, compress=3)
+
+    @classmethod
+    def load(cls, path: pathlib.Path | str):
+        """Loads an extractor saved by save.
+
+        Raises TypeError if the file holds another kind of extractor."""
+        saved = joblib.load(pathlib.Path(path))
+        if saved["class"] != cls.__name__:
+            raise TypeError(f"{path} holds a {saved['class']}, "
+                            f"not a {cls.__name__}")
+        extractor = cls.__new__(cls)
+        extractor._restore(saved["state"])
+        return extractor
+
+    def _restore(self, state: dict) -> None:
+        self.__dict__.update(state)
+
+
+class Extractor(Persistent):
     """Father class of bow_lda and tfidf_pbg.
     The methods in here are for most NOT implemented.
     Calling topic extraction methods results on NotImplementedError.
     This class only implements preprocessing text methods
-    once those are common to both classes."""
-    def __init__(self, discursos, partidos, n_components) -> None:
-        self.discursos = [preprocess(discurso) for discurso in discursos]
+    once those are common to both classes.
+    A LemmaCache can be given to reuse previously lemmatized speeches,
+    and a Processer of the same speeches can be shared between
+    extractors and metricas.DBAnalyzer to treat them only once.
+    The stages are recorded on an Instrumentation, by default the same
+    of the Processer."""
+    def __init__(self, discursos, partidos, n_components,
+                 cache: LemmaCache | None = None,
+                 text_processer: processer.Processer | None = None,
+                 instrumentation: Instrumentation | None = None) -> None:
+        if text_processer is None:
+            text_processer = processer.Processer(
+                [preprocess(discurso) for discurso in discursos],
+                cache=cache,
+                instrumentation=instrumentation)
+        if instrumentation is None:
+            instrumentation = text_processer.instrumentation
+        self.discursos = text_processer.discursos
         self.n_components = n_components
         self.treated = False
         self.partidos = partidos
         self.treated_discursos: list[list[str]]
-        self.nlp: spacy.language.Language
-        self.processer = processer.Processer(self.discursos)
+        self.processer = text_processer
+        self.instrumentation = instrumentation
 
-    def process_text(self, allowed_postags: list[str] | None = None) -> None:
+    def _restore(self, state: dict) -> None:
+        # A loaded extractor has no speeches, update receives the new ones
+        self.discursos = []
+        self.treated = False
+        self.processer = None
+        self.instrumentation = Instrumentation()
+        super()._restore(state)
+
+    def process_text(self,
+                     allowed_postags: list[str] | None = None,
+                     batch_size: int = 64,
+                     n_process: int = 1) -> None:
         """Processes the text on the Processer class"""
         treated_discursos = self.processer.process_text(
-            allowed_postags=allowed_postags)
+            allowed_postags=allowed_postags,
+            batch_size=batch_size,
+            n_process=n_process)
         self.treated_discursos = treated_discursos
 
     def get_processed_text(self):
@@ -63,80 +270,197 @@ class Extractor():
         """Extracts the topics"""
         raise NotImplementedError()
 
+    def update(self, discursos, partidos, n_words=20, **kwargs):
+        """Continues the training on new speeches"""
+        raise NotImplementedError()
+
+    def to_csv(self, path: pathlib.Path | str, weights: bool = False):
+        """The path must be a directory.
+
+        The topics of each party are saved on topics_{party}.csv,
+        and with weights their weights on weights_{party}.csv"""
+        if isinstance(path, str):
+            save_path = pathlib.Path(path)
+        elif isinstance(path, (pathlib.Path,
+                               pathlib.PosixPath,
+                               pathlib.WindowsPath)):
+            save_path = path
+        else:
+            raise TypeError()
+        save_path.mkdir(parents=True, exist_ok=True)
+        for i, df in enumerate(self.topics_keywords):
+            df.to_csv(save_path.joinpath(f"topics_{self.partidos[i]}.csv"))
+            if weights and self.topics_weights[i] is not None:
+                self.topics_weights[i].to_csv(
+                    save_path.joinpath(f"weights_{self.partidos[i]}.csv"))
+
 
 class BowLda(Extractor):
     '''This class implements Bag Of Words with LDA.
 
     This is a more usual approach to the topics extraction'''
+    _saved_attributes = ("partidos", "n_components", "feature_names",
+                         "lda_models", "n_documents", "topics_keywords",
+                         "topics_weights")
+
     def __init__(self,
                  discursos: list[list[str]],
                  partidos: list[str],
-                 n_components: int) -> None:
+                 n_components: int,
+                 cache: LemmaCache | None = None,
+                 text_processer: processer.Processer | None = None,
+                 instrumentation: Instrumentation | None = None) -> None:
         """Creates an topic extractor to use BoW and LDA to extract topics"""
         super().__init__(discursos,
                          partidos,
-                         n_components)
+                         n_components,
+                         cache=cache,
+                         text_processer=text_processer,
+                         instrumentation=instrumentation)
         self.vectorizer = sklearntext.CountVectorizer(analyzer="word",
                                                       stop_words=None,
                                                       lowercase=True)
         self.topics_keywords: list[pd.DataFrame]
+        self.topics_weights: list[pd.DataFrame]
         self.lda_models: list[LatentDirichletAllocation]
+        self.n_documents: list[int]
         self.data_vectorized: list
         self.feature_names: list
 
-    def topic_extraction(self, n_words):
+    def topic_extraction(self, n_words, n_jobs: int = 1):
         """Extracts topics from preprocessed texts utilizing LDA.
 
         Parameters:
 
             n_words: Number of words that should be saved at each topic.
 
+            n_jobs: Number of processes fitting the parties at once,
+                -1 uses every core. With 1 the parties are fitted one at
+                a time, each LDA using every core. The processes are
+                capped by the available memory, see max_workers.
+
         Returns:
             None.
 
         Be careful, this method consumes large amount of working memory,
         so do not try to use it with huge datasets on limited RAM machines
-        (RAM < 8GB does not work for 14000+ speeches, empirically tested)"""
-        self.lda_models = [self.__lda_transform_fit(data_vectorized_)
-                           for data_vectorized_ in self.data_vectorized]
-        topics_keywords_lst = [
-            self.__transform_topics(feature_name,
-                                    self.lda_models[i].components_,
-                                    n_words) for i, feature_name in enumerate(
-                                        self.feature_names)]
-        self.topics_keywords = [pd.DataFrame(topics_keywords)
-                                for topics_keywords in topics_keywords_lst]
-
-    def to_csv(self, path: pathlib.Path | str):
-        """The path must be a directory"""
-        if isinstance(path, str):
-            save_path = pathlib.Path(path)
-        elif (isinstance(path, pathlib.Path)) \
-            or (isinstance(path, pathlib.PosixPath)) \
-                or (isinstance(path, pathlib.WindowsPath)):
-            save_path = path
-        else:
-            raise TypeError()
-        save_path.mkdir(parents=True, exist_ok=True)
-        for i, df in enumerate(self.topics_keywords):
-            topics_path = save_path.joinpath(f"topics_{self.partidos[i]}.csv")
-            df.columns = pd.Index(["Word " + str(i)
-                                   for i in range(df.shape[1])])
-            df.index = pd.Index(["Topic " + str(i)
-                                 for i in range(df.shape[0])])
-            df.to_csv(topics_path)
+        (RAM < 8GB does not work for 14000+ speeches, empirically tested),
+        StreamingLda fits such corpora reading them in chunks"""
+        with self.instrumentation.stage(
+                "topic_extraction", items=len(self.data_vectorized)):
+            workers = max_workers(self.data_vectorized, self.n_components,
+                                  n_jobs)
+            if workers == 1:
+                self.lda_models = [fit_lda(data_vectorized_,
+                                           self.n_components)
+                                   for data_vectorized_
+                                   in self.data_vectorized]
+            else:
+                # Each process fits a whole party, so LDA uses a single core
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    self.lda_models = list(executor.map(
+                        fit_lda,
+                        self.data_vectorized,
+                        [self.n_components] * len(self.data_vectorized),
+                        [1] * len(self.data_vectorized)))
+            self.n_documents = [data_vectorized_.shape[0]
+                                for data_vectorized_ in self.data_vectorized]
+            self.__set_topics(n_words)
+
+    def __set_topics(self, n_words):
+        topics = [top_keywords(lda_model.components_, feature_name, n_words)
+                  for lda_model, feature_name in zip(self.lda_models,
+                                                     self.feature_names)]
+        self.topics_keywords = [topics_frame(keywords)
+                                for keywords, _ in topics]
+        self.topics_weights = [topics_frame(weights) for _, weights in topics]
+
+    def update(self,
+               discursos: list[list[str]],
+               partidos: list[str],
+               n_words=20,
+               allowed_postags: list[str] | None = None,
+               batch_size: int = 64,
+               n_process: int = 1,
+               cache: LemmaCache | None = None):
+        """Continues the training of the fitted models on new speeches,
+        usually on a loaded extractor.
 
-    def data_vectorizer(self):
-        """Vectorize the data in the class to create a Bow Matrix of each party."""
-        data_vectorized = []
-        feature_names = []
-        for discursos_ in self.treated_discursos:
-            data, feature_name = self.__data_vectorizer(self.vectorizer,
-                                                        discursos=discursos_)
-            data_vectorized.append(data)
-            feature_names.append(feature_name)
-        self.data_vectorized = data_vectorized
-        self.feature_names = feature_names
+        Parameters:
+
+            discursos: The new speeches of each party, as in the creation.
+
+            partidos: The party of each list of speeches. The models of
+                known parties continue from their state with partial_fit,
+                using their vocabulary, so new words are ignored.
+                Unknown parties get a new model.
+
+            n_words: Number of words that should be saved at each topic.
+
+            allowed_postags, batch_size, n_process: The same of process_text.
+
+            cache: A LemmaCache used to process the new speeches.
+
+        Returns:
+            None. The topics of every party are extracted again."""
+        with self.instrumentation.stage(
+                "update", items=sum(map(len, discursos))):
+            text_processer = processer.Processer(
+                [preprocess(discurso) for discurso in discursos], cache=cache,
+                instrumentation=self.instrumentation)
+            treated_discursos = text_processer.process_text(
+                allowed_postags=allowed_postags,
+                batch_size=batch_size,
+                n_process=n_process)
+            for partido, discursos_ in zip(partidos, treated_discursos):
+                if partido in self.partidos:
+                    i = self.partidos.index(partido)
+                    vectorizer = sklearntext.CountVectorizer(
+                        analyzer="word",
+                        stop_words=None,
+                        lowercase=True,
+                        vocabulary=self.feature_names[i])
+                    data = vectorizer.transform(discursos_)
+                    self.n_documents[i] += data.shape[0]
+                    # The learning rate considers the old and new speeches
+                    self.lda_models[i].set_params(
+                        total_samples=self.n_documents[i])
+                    self.lda_models[i].partial_fit(data)
+                else:
+                    vectorizer = sklearntext.CountVectorizer(
+                        analyzer="word",
+                        stop_words=None,
+                        lowercase=True)
+                    data = vectorizer.fit_transform(discursos_)
+                    self.partidos.append(partido)
+                    self.feature_names.append(
+                        vectorizer.get_feature_names_out())
+                    self.lda_models.append(fit_lda(data, self.n_components))
+                    self.n_documents.append(data.shape[0])
+            self.__set_topics(n_words)
+
+    def data_vectorizer(self, shared_vocabulary: bool = False):
+        """Vectorize the data in the class to create a Bow Matrix of each party.
+
+        With shared_vocabulary every party uses the vocabulary of the
+        whole corpus, see shared_vectorize."""
+        with self.instrumentation.stage(
+                "data_vectorizer",
+                items=sum(map(len, self.treated_discursos))):
+            if shared_vocabulary:
+                self.data_vectorized, self.feature_names = shared_vectorize(
+                    self.vectorizer, self.treated_discursos)
+                return
+            data_vectorized = []
+            feature_names = []
+            for discursos_ in self.treated_discursos:
+                data, feature_name = self.__data_vectorizer(
+                    self.vectorizer,
+                    discursos=discursos_)
+                data_vectorized.append(data)
+                feature_names.append(feature_name)
+            self.data_vectorized = data_vectorized
+            self.feature_names = feature_names
 
     def __data_vectorizer(self,
                           vectorizer: sklearntext.CountVectorizer,
@@ -145,154 +469,409 @@ class BowLda(Extractor):
         feature_names = vectorizer.get_feature_names_out()
         return matrix_discursos, feature_names
 
-    def __lda_transform_fit(self,
-                            data_vectorized: np.ndarray
-                            ) -> LatentDirichletAllocation:
-
-        lda_model = LatentDirichletAllocation(
-            learning_method="online",
-            random_state=100,
-            batch_size=128,
-            evaluate_every=-1,
-            n_jobs=-1,
-            n_components=self.n_components
-        )
-        # Applies the data to the model before saving it
-        # The result is not captured once it's not used
-        lda_model.fit_transform(data_vectorized)
-        return lda_model
-
-    def __transform_topics(self,
-                           feature_names: np.ndarray,
-                           lda_model_components: np.ndarray,
-                           n_words=20) -> list:
-
-        keywords = np.array(feature_names)
-        topic_keywords = []
-        for topic_weights in lda_model_components:
-            top_keyword_locs = (-topic_weights).argsort()[:n_words]
-            topic_keywords.append(keywords.take(top_keyword_locs))
-        return topic_keywords
-
 
 class TfidfPbg(Extractor):
     '''Implements TF-IDF with PBG.
 
-    A graph approach to the topic extraction problem'''
+    A graph approach to the topic extraction problem
+
+    The fitted models can be saved and loaded, but PBG has no incremental
+    training, so update is not implemented.'''
+    _saved_attributes = ("partidos", "n_components", "feature_names",
+                         "pbg", "topics_keywords", "topics_weights")
+
     def __init__(self,
                  discursos: list[list[str]],
                  partidos: list[str],
-                 n_components: int) -> None:
+                 n_components: int,
+                 cache: LemmaCache | None = None,
+                 text_processer: processer.Processer | None = None,
+                 instrumentation: Instrumentation | None = None) -> None:
         """Creates a topic extractor to use TF-IDF and PBG."""
-        super().__init__(discursos, partidos, n_components)
+        super().__init__(discursos, partidos, n_components, cache=cache,
+                         text_processer=text_processer,
+                         instrumentation=instrumentation)
         self.vectorizer = sklearntext.TfidfVectorizer()
         self.data_vectorized: list
         self.feature_names: list
         self.pbg: list[pbg.PBG]
         self.topics_keywords: list[pd.DataFrame]
+        self.topics_weights: list[pd.DataFrame | None]
 
-    def data_vectorizer(self):
+    def data_vectorizer(self, shared_vocabulary: bool = False):
         """Vectorize data to create a TF-IDF matrix that will be used to extract topics.
         Parameters:
-            None.
+            shared_vocabulary: Every party uses the vocabulary of the
+                whole corpus, see shared_vectorize.
+                The idf is still computed for each party.
         Returns:
             None."""
-        data_vectorized = []
-        feature_names = []
-        for discursos_ in self.treated_discursos:
-            data, feature_name = self.__data_vectorizer(
-                self.vectorizer,
-                discursos=discursos_)
-            data_vectorized.append(data)
-            feature_names.append(feature_name)
-        self.data_vectorized = data_vectorized
-        self.feature_names = feature_names
+        with self.instrumentation.stage(
+                "data_vectorizer",
+                items=sum(map(len, self.treated_discursos))):
+            if shared_vocabulary:
+                counts, feature_names = shared_vectorize(
+                    sklearntext.CountVectorizer(analyzer="word",
+                                                lowercase=True),
+                    self.treated_discursos)
+                self.from_counts(counts, feature_names)
+                return
+            data_vectorized = []
+            feature_names = []
+            for discursos_ in self.treated_discursos:
+                data, feature_name = self.__data_vectorizer(
+                    self.vectorizer,
+                    discursos=discursos_)
+                data_vectorized.append(data)
+                feature_names.append(feature_name)
+            self.data_vectorized = data_vectorized
+            self.feature_names = feature_names
 
     def __data_vectorizer(self, vectorizer, discursos):
         matrix_discursos = vectorizer.fit_transform(discursos)
         feature_names = vectorizer.get_feature_names_out()
         return matrix_discursos, feature_names
 
-    def topic_extraction(self, n_words):
+    def from_counts(self, data_counts: list, feature_names: list):
+        """Creates the TF-IDF matrices from the BoW counts of each party,
+        as the ones of BowLda, without tokenizing the speeches again.
+
+        The result is the same as data_vectorizer for the same vocabulary.
+        Parameters:
+            data_counts: The count matrix of each party.
+            feature_names: The feature names of each party.
+        Returns:
+            None."""
+        with self.instrumentation.stage(
+                "from_counts",
+                items=sum(counts.shape[0] for counts in data_counts)):
+            self.data_vectorized = [
+                sklearntext.TfidfTransformer().fit_transform(counts)
+                for counts in data_counts]
+            self.feature_names = feature_names
+
+    def topic_extraction(self, n_words, n_jobs: int = 1):
         """Extracts the topics from a corpus utilizing PBG algorithm.
         Parameters:
             n_words: Number of words to be extracted at each topic
+            n_jobs: Number of processes fitting the parties at once,
+                -1 uses every core. The processes are capped by the
+                available memory, see max_workers.
         Returns:
             None.
             Saves the topics at self.topics_keywords as a list of Dataframes
         """
-        self.pbg = [pbg.PBG(n_components=self.n_components,
-                            feature_names=feature_name,
-                            save_interval=1)
-                    for feature_name in self.feature_names]
-        topics_discursos = []
-        for i, data_vectorized in enumerate(self.data_vectorized):
-            self.pbg[i].fit(data_vectorized)
-            topics_discursos.append(self.pbg[i].get_topics(n_top_words=n_words))
-
-        self.topics_keywords = [pd.DataFrame(topics_keywords)
-                                for topics_keywords in topics_discursos]
-
-    def to_csv(self, path: pathlib.Path | str):
-        """The path must be a directory"""
-        if isinstance(path, str):
-            save_path = pathlib.Path(path)
-        elif isinstance(path, (pathlib.Path,
-                               pathlib.PosixPath,
-                               pathlib.WindowsPath)):
-            save_path = path
-        else:
-            raise TypeError()
+        with self.instrumentation.stage(
+                "topic_extraction", items=len(self.data_vectorized)):
+            n_parties = len(self.data_vectorized)
+            arguments = (self.data_vectorized,
+                         self.feature_names,
+                         [self.n_components] * n_parties,
+                         [n_words] * n_parties)
+            workers = max_workers(self.data_vectorized, self.n_components,
+                                  n_jobs)
+            if workers == 1:
+                fitted = list(map(fit_pbg, *arguments))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    fitted = list(executor.map(fit_pbg, *arguments))
+            self.pbg = [pbg_model for pbg_model, _ in fitted]
+
+            self.topics_keywords = [topics_frame(keywords)
+                                    for _, keywords in fitted]
+            # get_topics gives only the words, without their weights
+            self.topics_weights = [None] * n_parties
+
+
+class StreamingLda(Persistent):
+    '''Implements LDA over speeches read in chunks from the disk.
+
+    The whole corpus is never in memory: the speeches are read with
+    leitura.iter_discursos, processed, vectorized with a fixed vocabulary
+    and given to LatentDirichletAllocation.partial_fit one chunk at a time,
+    so the memory is bounded by chunk_size and by the vocabulary.
+
+    The corpus is read once to build the vocabulary and again on each pass
+    of the fitting. With a LemmaCache only the first reading lemmatizes.
+
+    A saved model can be loaded and fitted on newly scraped speeches,
+    changing the filters of the corpus, continuing from its state with the
+    same vocabulary.'''
+    _saved_attributes = ("n_components", "chunk_size", "min_df",
+                         "max_features", "vectorizer", "lda_model",
+                         "n_documents", "feature_names")
+
+    def __init__(self,
+                 path: pathlib.Path | str,
+                 n_components: int,
+                 chunk_size: int = 1000,
+                 legislaturas: list[int] | None = None,
+                 partidos: list[str] | None = None,
+                 anos: list[int] | None = None,
+                 cache: LemmaCache | None = None,
+                 min_df: int = 1,
+                 max_features: int | None = None,
+                 instrumentation: Instrumentation | None = None) -> None:
+        """Creates a topic extractor of the speeches on path.
+
+        Parameters:
+            path, legislaturas, partidos, anos: The speeches to be read,
+                as in leitura.ler_discursos.
+            chunk_size: Number of speeches read and fitted at once.
+            min_df: Minimum number of speeches a word must be in
+                to enter the vocabulary.
+            max_features: Maximum size of the vocabulary, keeping the words
+                found on more speeches.
+            instrumentation: Records the stages, a new one if None."""
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+        self.path = pathlib.Path(path)
+        self.n_components = n_components
+        self.chunk_size = chunk_size
+        self.legislaturas = legislaturas
+        self.partidos = partidos
+        self.anos = anos
+        self.cache = cache
+        self.min_df = min_df
+        self.max_features = max_features
+        self.vectorizer = sklearntext.CountVectorizer(analyzer="word",
+                                                      stop_words=None,
+                                                      lowercase=True)
+        self.lda_model = LatentDirichletAllocation(
+            learning_method="online",
+            random_state=100,
+            batch_size=128,
+            evaluate_every=-1,
+            n_jobs=-1,
+            n_components=n_components
+        )
+        self.n_documents = 0
+        self.feature_names: np.ndarray | None = None
+        self.instrumentation = instrumentation
+        self.topics_keywords: pd.DataFrame
+        self.topics_weights: pd.DataFrame
+
+    def _restore(self, state: dict) -> None:
+        self.instrumentation = Instrumentation()
+        super()._restore(state)
+
+    def iter_processed(self,
+                       allowed_postags: list[str] | None = None,
+                       batch_size: int = 64,
+                       n_process: int = 1) -> Iterator[list[str]]:
+        """Reads and processes the speeches, yielding one chunk at a time.
+        The parameters are the same of Extractor.process_text."""
+        for df in iter_discursos(self.path,
+                                 chunk_size=self.chunk_size,
+                                 legislaturas=self.legislaturas,
+                                 partidos=self.partidos,
+                                 anos=self.anos,
+                                 columns=["transcricao"]):
+            discursos = preprocess(df["transcricao"].fillna("").tolist())
+            text_processer = processer.Processer(
+                [discursos],
+                cache=self.cache,
+                instrumentation=self.instrumentation)
+            yield text_processer.process_text(allowed_postags=allowed_postags,
+                                              batch_size=batch_size,
+                                              n_process=n_process)[0]
+
+    def build_vocabulary(self,
+                         allowed_postags: list[str] | None = None,
+                         batch_size: int = 64,
+                         n_process: int = 1) -> None:
+        """Reads the corpus once, fixing the vocabulary of the vectorizer
+        and counting the speeches."""
+        with self.instrumentation.stage("build_vocabulary") as record:
+            analyzer = self.vectorizer.build_analyzer()
+            document_frequency: Counter[str] = Counter()
+            n_documents = 0
+            for discursos in self.iter_processed(allowed_postags,
+                                                 batch_size=batch_size,
+                                                 n_process=n_process):
+                n_documents += len(discursos)
+                for discurso in discursos:
+                    document_frequency.update(set(analyzer(discurso)))
+            record["items"] = n_documents
+        words = [word for word, frequency in document_frequency.items()
+                 if frequency >= self.min_df]
+        if self.max_features is not None:
+            words.sort(key=lambda word: (-document_frequency[word], word))
+            words = words[:self.max_features]
+        vocabulary = sorted(words)
+        self.vectorizer = sklearntext.CountVectorizer(analyzer="word",
+                                                      stop_words=None,
+                                                      lowercase=True,
+                                                      vocabulary=vocabulary)
+        self.feature_names = np.array(vocabulary, dtype=object)
+        self.n_documents = n_documents
+
+    def fit(self,
+            allowed_postags: list[str] | None = None,
+            batch_size: int = 64,
+            n_process: int = 1,
+            n_passes: int = 1) -> None:
+        """Fits the LDA model, one chunk at a time.
+
+        Parameters:
+            allowed_postags, batch_size, n_process: The same of
+                Extractor.process_text.
+            n_passes: Number of times the corpus is given to the model.
+        Returns:
+            None."""
+        if self.feature_names is None:
+            self.build_vocabulary(allowed_postags,
+                                  batch_size=batch_size,
+                                  n_process=n_process)
+        # The learning rate of online LDA depends on the size of the corpus
+        self.lda_model.set_params(total_samples=self.n_documents)
+        with self.instrumentation.stage(
+                "fit", items=self.n_documents * n_passes):
+            for _ in range(n_passes):
+                for discursos in self.iter_processed(allowed_postags,
+                                                     batch_size=batch_size,
+                                                     n_process=n_process):
+                    self.lda_model.partial_fit(
+                        self.vectorizer.transform(discursos))
+
+    def update(self,
+               path: pathlib.Path | str,
+               legislaturas: list[int] | None = None,
+               partidos: list[str] | None = None,
+               anos: list[int] | None = None,
+               cache: LemmaCache | None = None,
+               allowed_postags: list[str] | None = None,
+               batch_size: int = 64,
+               n_process: int = 1) -> None:
+        """Continues the fitting of the model on new speeches,
+        usually on a loaded extractor. The words out of the vocabulary
+        are ignored.
+
+        Parameters:
+            path, legislaturas, partidos, anos: The new speeches,
+                as in the creation.
+            cache, allowed_postags, batch_size, n_process: The same of fit.
+        Returns:
+            None."""
+        self.path = pathlib.Path(path)
+        self.legislaturas = legislaturas
+        self.partidos = partidos
+        self.anos = anos
+        self.cache = cache
+        with self.instrumentation.stage("update", items=0) as record:
+            for discursos in self.iter_processed(allowed_postags,
+                                                 batch_size=batch_size,
+                                                 n_process=n_process):
+                # The size of the corpus is only known after reading it
+                self.n_documents += len(discursos)
+                self.lda_model.set_params(total_samples=self.n_documents)
+                self.lda_model.partial_fit(
+                    self.vectorizer.transform(discursos))
+                record["items"] += len(discursos)
+
+    def topic_extraction(self, n_words):
+        """Extracts the topics of the fitted model.
+
+        Parameters:
+
+            n_words: Number of words that should be saved at each topic.
+
+        Returns:
+            None."""
+        keywords, weights = top_keywords(self.lda_model.components_,
+                                         self.feature_names, n_words)
+        self.topics_keywords = topics_frame(keywords)
+        self.topics_weights = topics_frame(weights)
+
+    def to_csv(self, path: pathlib.Path | str, weights: bool = False):
+        """The path must be a directory, the topics are saved on topics.csv
+        and with weights their weights on weights.csv"""
+        save_path = pathlib.Path(path)
         save_path.mkdir(parents=True, exist_ok=True)
-        for i, df in enumerate(self.topics_keywords):
-            topics_path = save_path.joinpath(f"topics_{self.partidos[i]}.csv")
-            df.columns = pd.Index(["Word " + str(i) for i in range(df.shape[1])])
-            df.index = pd.Index(["Topic " + str(i) for i in range(df.shape[0])])
-            df.to_csv(topics_path)
+        self.topics_keywords.to_csv(save_path.joinpath("topics.csv"))
+        if weights:
+            self.topics_weights.to_csv(save_path.joinpath("weights.csv"))
 
 
 def main():
     '''
     Extracts topics for a determined party, in this case, Novo.
 
-    The function reads the speeches and save the table of topics
-    on the determined path.'''
-    path_reading = pathlib.Path("./discursos/legis_56/p_novo/2022/")
+    The function reads the speeches saved by the scraper
+    and save the table of topics on the determined path.'''
+    path_reading = pathlib.Path("./discursos/parquet/")
     save_path_lda = pathlib.Path("./topics/lda/legis_56/p_novo/2022/")
     save_path_pbg = pathlib.Path("./topics/pbg/legis_56/p_novo/2022/")
-    files = path_reading.iterdir()
-    df_list = [pd.read_csv(file) for file in files]
+    df_list = ler_discursos(path_reading,
+                            legislaturas=[56],
+                            partidos=["NOVO"],
+                            anos=[2022])
     partidos = []
     discursos = []
     for df in df_list:
         # In this case, the only party is Novo,
         # but this code is ready for multiple parties
-        # The code isn't ready for multiple parties on a single file
+        # Each DataFrame holds the speeches of a single party
         partidos.extend(df["sigla"].unique().tolist())
         discursos.append(df["transcricao"].tolist())
 
-    lda = BowLda(discursos=discursos, partidos=partidos, n_components=12)
+    # Reruns with other parameters reuse the lemmatized speeches
+    cache = LemmaCache()
+    # Prints each finished stage, the report is saved with the topics
+    instrumentation = Instrumentation(verbose=True)
+    lda = BowLda(discursos=discursos, partidos=partidos, n_components=12,
+                 cache=cache, instrumentation=instrumentation)
     print("Processando LDA")
     lda.process_text()
     lda.data_vectorizer()
     print("Extraindo lDA")
-    lda.topic_extraction(15)
+    lda.topic_extraction(15, n_jobs=-1)
     print("Salvando LDA")
     lda.to_csv(save_path_lda)
+    lda.save(save_path_lda.joinpath("model.joblib"))
 
-    treated_discursos = lda.get_processed_text()
+    # The TF-IDF matrices are created from the counts of the LDA
+    data_counts = lda.data_vectorized
+    feature_names = lda.feature_names
 
     # Necessary so the memory on the test computer doesn't run empty
     del lda
 
-    pbg_ex = TfidfPbg(discursos=discursos, partidos=partidos, n_components=12)
+    pbg_ex = TfidfPbg(discursos=discursos, partidos=partidos, n_components=12,
+                      instrumentation=instrumentation)
     print("Processando PBG")
-    pbg_ex.treated_discursos = treated_discursos
-    pbg_ex.data_vectorizer()
+    pbg_ex.from_counts(data_counts, feature_names)
     print("Extraindo PBG")
-    pbg_ex.topic_extraction(15)
+    pbg_ex.topic_extraction(15, n_jobs=-1)
     print("Salvando PBG")
     pbg_ex.to_csv(save_path_pbg)
+    pbg_ex.save(save_path_pbg.joinpath("model.joblib"))
+    instrumentation.to_json(save_path_pbg.joinpath("report.json"))
+
+
+def main_update():
+    '''
+    Continues the training of the LDA saved by main
+    with the speeches of Novo in 2023.
+    '''
+    path_reading = pathlib.Path("./discursos/parquet/")
+    model_path = pathlib.Path("./topics/lda/legis_56/p_novo/2022/model.joblib")
+    save_path_lda = pathlib.Path("./topics/lda/legis_57/p_novo/2023/")
+    df_list = ler_discursos(path_reading,
+                            legislaturas=[57],
+                            partidos=["NOVO"],
+                            anos=[2023])
+    partidos = []
+    discursos = []
+    for df in df_list:
+        partidos.extend(df["sigla"].unique().tolist())
+        discursos.append(df["transcricao"].tolist())
+
+    lda = BowLda.load(model_path)
+    print("Atualizando LDA")
+    lda.update(discursos, partidos, n_words=15, cache=LemmaCache())
+    lda.to_csv(save_path_lda)
+    lda.save(save_path_lda.joinpath("model.joblib"))
 
 
 def main_oposicao():
@@ -304,8 +883,7 @@ def main_oposicao():
     path_reading = pathlib.Path("./discursos/legis_56/oposição/2019/")
     save_path_lda = pathlib.Path("./topics/lda/legis56/oposição/2019/")
     save_path_pbg = pathlib.Path("./topics/pbg/legis_56/oposição/2019/")
-    files = path_reading.iterdir()
-    df_list = [pd.read_csv(file) for file in files]
+    df_list = ler_discursos(path_reading)
     partidos = ["oposição"]  # Partido "governista"
     discursos = []
     for df in df_list:
@@ -316,21 +894,42 @@ def main_oposicao():
     # O algoritmo espera receber [[discursosA], [discursosB],...],
     # nesse caso tem-se somente uma lista de discursos
 
-    lda = BowLda(discursos=discursos, partidos=partidos, n_components=30)
+    lda = BowLda(discursos=discursos, partidos=partidos, n_components=30,
+                 cache=LemmaCache())
     lda.process_text(allowed_postags=["NOUN", "VERB", "PUNCT"])
     lda.data_vectorizer()
     lda.topic_extraction(n_words=20)
     lda.to_csv(save_path_lda)
-    treated_texts = lda.get_processed_text()
+    data_counts = lda.data_vectorized
+    feature_names = lda.feature_names
 
     del lda
 
     pbg_ex = TfidfPbg(discursos=discursos, partidos=partidos, n_components=30)
-    pbg_ex.treated_discursos = treated_texts
-    pbg_ex.data_vectorizer()
+    pbg_ex.from_counts(data_counts, feature_names)
     pbg_ex.topic_extraction(20)
     pbg_ex.to_csv(save_path_pbg)
 
 
+def main_streaming():
+    '''
+    Extracts the topics of a whole legislature with StreamingLda.
+
+    The speeches are read in chunks from the Parquet dataset,
+    so the corpus does not need to fit on the memory.
+    '''
+    path_reading = pathlib.Path("./discursos/parquet/")
+    save_path_lda = pathlib.Path("./topics/lda/legis_56/streaming/")
+    lda = StreamingLda(path_reading, n_components=30, chunk_size=2000,
+                       legislaturas=[56], cache=LemmaCache(), min_df=2)
+    print("Construindo vocabulário")
+    lda.build_vocabulary()
+    print("Extraindo LDA")
+    lda.fit()
+    lda.topic_extraction(n_words=20)
+    lda.to_csv(save_path_lda)
+    lda.save(save_path_lda.joinpath("model.joblib"))
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,141 @@
+'''Module that instruments the long runs of the code.
+
+This module contains the [Instrumentation] class, shared by the Processer,
+the topic extractors, the DBAnalyzer and the scraper, which records the
+time of each stage, its throughput, counters like the HTTP requests made
+and the retry-after waits, and the peak RSS of the process.'''
+
+import contextlib
+import csv
+import json
+import pathlib
+import sys
+import threading
+import time
+
+import psutil
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss() -> int:
+    """Returns the peak resident set size of the process, in bytes"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+    memory = psutil.Process().memory_info()
+    return getattr(memory, "peak_wset", memory.rss)
+
+
+class Instrumentation():
+    """
+    This class records the stages and counters of a run.
+
+    The stages are timed with the stage context manager, which also
+    computes the throughput when the number of items is given.
+    The counters are incremented with count, and can be used from threads.
+    With verbose, each finished stage and progress is printed.
+
+    The records are exported with to_json or to_csv."""
+    def __init__(self, verbose: bool = False) -> None:
+        self.verbose = verbose
+        self.stages: list[dict] = []
+        self.counters: dict[str, float] = {}
+        self.__lock = threading.Lock()
+        self.__init_time = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, items: int | None = None):
+        """Times the code inside the with block as the stage name.
+
+        Yields the record of the stage, where items can be set
+        when it is only known at the end of the stage."""
+        record: dict = {"stage": name, "items": items}
+        init_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - init_time
+            record["seconds"] = seconds
+            record["throughput"] = (record["items"] / seconds
+                                    if record["items"] and seconds > 0
+                                    else None)
+            record["peak_rss_mb"] = peak_rss() / 1e6
+            with self.__lock:
+                self.stages.append(record)
+            if self.verbose:
+                print(self.__format_stage(record))
+
+    def __format_stage(self, record: dict) -> str:
+        text = f"{record['stage']}: {record['seconds']:.2f} s"
+        if record["items"] is not None:
+            text += f", {record['items']} items"
+        if record["throughput"] is not None:
+            text += f" ({record['throughput']:.1f}/s)"
+        return text + f", peak RSS {record['peak_rss_mb']:.1f} MB"
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Increments the counter name by value"""
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def progress(self, name: str, done: int, total: int) -> None:
+        """Reports the progress of a stage, printing it with verbose"""
+        if self.verbose and total:
+            print(f"{name}: {done}/{total} ({100 * done / total:.0f}%)")
+
+    def response_hook(self, response, *args, **kwargs) -> None:
+        """Hook of requests.Session counting the HTTP requests made,
+        the status 429 received and the seconds of retry-after asked.
+
+        Register it with session.hooks["response"].append."""
+        self.count("http_requests")
+        if response.status_code == 429:
+            self.count("http_429")
+            retry_after = response.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                self.count("retry_after_seconds", int(retry_after))
+
+    def report(self) -> dict:
+        """Returns the records of the run"""
+        return {"total_seconds": time.perf_counter() - self.__init_time,
+                "peak_rss_mb": peak_rss() / 1e6,
+                "stages": list(self.stages),
+                "counters": dict(self.counters)}
+
+    def to_json(self, path: pathlib.Path | str) -> None:
+        """Saves the report as a JSON file"""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2), "utf-8")
+
+    def to_csv(self, path: pathlib.Path | str) -> None:
+        """Saves the report as a CSV file,
+        with a row for each stage and for each counter"""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = self.report()
+        columns = ["kind", "name", "seconds", "items", "throughput",
+                   "peak_rss_mb", "value"]
+        with path.open("w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            for record in report["stages"]:
+                writer.writerow({"kind": "stage",
+                                 "name": record["stage"],
+                                 "seconds": record["seconds"],
+                                 "items": record["items"],
+                                 "throughput": record["throughput"],
+                                 "peak_rss_mb": record["peak_rss_mb"]})
+            for name, value in report["counters"].items():
+                writer.writerow({"kind": "counter",
+                                 "name": name,
+                                 "value": value})
+            writer.writerow({"kind": "total",
+                             "name": "run",
+                             "seconds": report["total_seconds"],
+                             "peak_rss_mb": report["peak_rss_mb"]})
@@ -0,0 +1,122 @@
+'''This module reads the speeches saved by the scraper.
+
+The speeches can be saved as a Parquet dataset, partitioned by legislature,
+party and year, or as a folder of CSV files, one for each party.'''
+
+import pathlib
+from collections.abc import Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+PARTICOES = ["legislatura", "partido", "ano"]
+
+
+def ler_discursos(path: pathlib.Path | str,
+                  legislaturas: list[int] | None = None,
+                  partidos: list[str] | None = None,
+                  anos: list[int] | None = None) -> list[pd.DataFrame]:
+    '''Reads the speeches on path, returning one DataFrame for each party.
+
+    Parameters:
+        path: A Parquet dataset written by ParquetSink
+            or a folder of CSV files, one for each party.
+        legislaturas, partidos, anos: Optional filters of the speeches.
+            On Parquet datasets only the matching partitions are read.
+    Returns:
+        A list of DataFrames, each of them with the speeches of a party.'''
+    path = pathlib.Path(path)
+    csv_files = sorted(path.glob("*.csv"))
+    if csv_files:
+        df_list = [pd.read_csv(file) for file in csv_files]
+        if legislaturas is None and partidos is None and anos is None:
+            return df_list
+        df_list = [_filter_csv(df, legislaturas, partidos, anos)
+                   for df in df_list]
+        return [df for df in df_list if not df.empty]
+
+    filters = []
+    if legislaturas is not None:
+        filters.append(("legislatura", "in", legislaturas))
+    if partidos is not None:
+        filters.append(("partido", "in", partidos))
+    if anos is not None:
+        filters.append(("ano", "in", anos))
+    df = pd.read_parquet(path, filters=filters or None)
+    df = df.drop(columns=[coluna for coluna in PARTICOES
+                          if coluna in df.columns])
+    return [df_partido.reset_index(drop=True)
+            for _, df_partido in df.groupby("sigla", sort=True)]
+
+
+def iter_discursos(path: pathlib.Path | str,
+                   chunk_size: int = 1000,
+                   legislaturas: list[int] | None = None,
+                   partidos: list[str] | None = None,
+                   anos: list[int] | None = None,
+                   columns: list[str] | None = None
+                   ) -> Iterator[pd.DataFrame]:
+    '''Reads the speeches on path in chunks, without loading all of them.
+
+    Parameters:
+        path, legislaturas, partidos, anos: The same of ler_discursos.
+        chunk_size: Approximate number of speeches in each chunk,
+            the chunks of Parquet datasets may hold up to twice it.
+        columns: Columns to be read, all of them if None.
+    Returns:
+        An iterator of DataFrames, with speeches of any party.'''
+    path = pathlib.Path(path)
+    csv_files = sorted(path.glob("*.csv"))
+    if csv_files:
+        for file in csv_files:
+            for df in pd.read_csv(file, chunksize=chunk_size):
+                df = _filter_csv(df, legislaturas, partidos, anos)
+                if not df.empty:
+                    yield df if columns is None else df[columns]
+        return
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    filters = []
+    if legislaturas is not None:
+        filters.append(ds.field("legislatura").isin(legislaturas))
+    if partidos is not None:
+        filters.append(ds.field("partido").isin(partidos))
+    if anos is not None:
+        filters.append(ds.field("ano").isin(anos))
+    expression = None
+    for filter_ in filters:
+        expression = filter_ if expression is None else expression & filter_
+    if columns is None:
+        columns = [coluna for coluna in dataset.schema.names
+                   if coluna not in PARTICOES]
+    # Each file holds the speeches of a deputy in a year,
+    # so the batches are joined until they reach chunk_size
+    batches = []
+    n_rows = 0
+    for batch in dataset.to_batches(columns=columns, filter=expression,
+                                    batch_size=chunk_size):
+        batches.append(batch)
+        n_rows += batch.num_rows
+        if n_rows >= chunk_size:
+            yield pa.Table.from_batches(batches).to_pandas()
+            batches = []
+            n_rows = 0
+    if n_rows:
+        yield pa.Table.from_batches(batches).to_pandas()
+
+
+def _filter_csv(df: pd.DataFrame,
+                legislaturas: list[int] | None,
+                partidos: list[str] | None,
+                anos: list[int] | None) -> pd.DataFrame:
+    mask = pd.Series(True, index=df.index)
+    if legislaturas is not None:
+        mask &= df["idLegislatura"].isin(legislaturas)
+    if partidos is not None:
+        mask &= df["sigla"].isin(partidos)
+    if anos is not None:
+        anos_discursos = pd.to_numeric(df["dataHoraInicio"].str[:4],
+                                       errors="coerce")
+        mask &= anos_discursos.isin(anos)
+    return df[mask]
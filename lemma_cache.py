@@ -0,0 +1,81 @@
+'''Module that contains the persistent cache of lemmatized speeches.
+
+This module contains the [LemmaCache] class.'''
+
+import hashlib
+import pathlib
+import sqlite3
+from collections.abc import Callable
+
+import spacy
+
+
+class LemmaCache():
+    """
+    This class keeps the lemmatized speeches on a SQLite file.
+
+    Each speech is addressed by the hash of its text, the allowed postags
+    and the name and version of the spaCy model, so reprocessing an already
+    processed corpus does not need spaCy at all."""
+    def __init__(self,
+                 path: pathlib.Path | str = "./.cache/lemmas.sqlite",
+                 model: str = "pt_core_news_lg") -> None:
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        version = spacy.util.get_package_version(model) or "unknown"
+        self.model = f"{model}=={version}"
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS lemmas (
+                                       key TEXT PRIMARY KEY,
+                                       text TEXT NOT NULL)""")
+        self.connection.commit()
+
+    def key(self, text: str, allowed_postags: list[str]) -> str:
+        """Returns the address of a speech on the cache"""
+        content = "\x1f".join([self.model,
+                               ",".join(sorted(allowed_postags)),
+                               text])
+        return hashlib.blake2b(content.encode("utf-8"),
+                               digest_size=20).hexdigest()
+
+    def get(self, keys: list[str]) -> dict[str, str]:
+        """Returns the cached texts of the given keys that are present"""
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            found.update(self.connection.execute(
+                f"SELECT key, text FROM lemmas WHERE key IN ({placeholders})",
+                chunk))
+        return found
+
+    def put(self, items: dict[str, str]) -> None:
+        """Saves the texts, addressed by their keys"""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO lemmas VALUES (?, ?)", items.items())
+        self.connection.commit()
+
+    def lemmatize(self,
+                  texts: list[str],
+                  allowed_postags: list[str],
+                  lemmatizer: Callable[[list[str]], list[str]]) -> list[str]:
+        """Returns the lemmatized texts, in the same order.
+
+        Only the texts missing from the cache are given to lemmatizer,
+        and its results are saved on the cache."""
+        keys = [self.key(text, allowed_postags) for text in texts]
+        found = self.get(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing[key] = text
+        if missing:
+            lemmatized = lemmatizer(list(missing.values()))
+            computed = dict(zip(missing.keys(), lemmatized))
+            self.put(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def close(self) -> None:
+        """Closes the cache file"""
+        self.connection.close()
@@ -2,169 +2,159 @@
 
 The main thing in this module is the DBAnalyzer class'''
 
-import string
 import pathlib
-import time
+from collections import Counter
 
 import pandas as pd
-from nltk.corpus import stopwords
-import numpy as np
-import nltk
-import spacy
 
 from preprocess import preprocess
+from processer import Processer
+from lemma_cache import LemmaCache
+from leitura import ler_discursos
+from instrumentation import Instrumentation
 
 
 class DBAnalyzer():
     '''
     This class is made to calculate some calculations from the Data.
     Like the different words, the most used words and the word count
-    for each party'''
+    for each party
+
+    The text treatment is made by a processer.Processer,
+    which can be shared with the topic extractors of the same speeches
+    so the corpus is treated only once. The speeches are given either
+    as ll_discursos or by the processer, never both.
+    With a LemmaCache, the speeches already lemmatized are read from it.
+    The stages are recorded on an Instrumentation, by default the same
+    of the Processer.'''
     def __init__(self,
-                 ll_discursos: list[list[str]],
-                 partidos: list[str]) -> None:
-        self.stop_words = set(stopwords.words("portuguese"))
-        self.stop_words.update(pathlib.Path("./stop_words.txt")
-                               .read_text("utf-8").splitlines())
-        self.discursos = [preprocess(discursos) for discursos in ll_discursos]
+                 ll_discursos: list[list[str]] | None,
+                 partidos: list[str],
+                 cache: LemmaCache | None = None,
+                 processer: Processer | None = None,
+                 instrumentation: Instrumentation | None = None) -> None:
+        if (ll_discursos is None) == (processer is None):
+            raise ValueError("give either ll_discursos or a processer "
+                             "with the speeches, not both")
+        if processer is None:
+            processer = Processer([preprocess(discursos)
+                                   for discursos in ll_discursos],
+                                  cache=cache,
+                                  instrumentation=instrumentation)
+        if instrumentation is None:
+            instrumentation = processer.instrumentation
+        self.instrumentation = instrumentation
+        self.processer = processer
+        self.stop_words = processer.stop_words
+        self.discursos = processer.discursos
         self.partidos = partidos
         self.words_diff = None
         self.words_diff_num: list[int]
         self.most_used_words: list[str]
+        self.top_words: list[list[tuple[str, int]]]
         self.word_count: list[float]
+        self.word_counters: list[Counter] | None = None
+        self.n_words: list[int]
         self.treated_discursos: list[list[str]]
 
-    def treat_discursos(self):
+    def treat_discursos(self, batch_size: int = 64, n_process: int = 1):
         """This function treat the speaches provided doing lemmatization
-        and removing stopwords and punctuation"""
-        lemmatized_discurso = self.lemmatization()
-        discursos_lower = [[discurso.lower() for discurso in discursos]
-                           for discursos in lemmatized_discurso]
-        discursos_tokenized = [[nltk.word_tokenize(discurso)
-                                for discurso in discursos]
-                               for discursos in discursos_lower]
-        treated_discursos = [self.remove_stopwords_punct(discursos)
-                             for discursos in discursos_tokenized]
-        self.treated_discursos = treated_discursos
-
-    def lemmatization(self):
+        and removing stopwords and punctuation
+
+        batch_size and n_process are given to spaCy nlp.pipe"""
+        with self.instrumentation.stage(
+                "treat_discursos",
+                items=sum(len(discursos) for discursos in self.discursos)):
+            discursos_tokenized = self.processer.tokenize(batch_size=batch_size,
+                                                          n_process=n_process)
+            treated_discursos = [self.remove_stopwords_punct(discursos)
+                                 for discursos in discursos_tokenized]
+            self.treated_discursos = treated_discursos
+            self.word_counters = None
+
+    def lemmatization(self, batch_size: int = 64, n_process: int = 1):
         '''Makes the lemmatization on the text for all parties.'''
-        nlp = spacy.load("pt_core_news_lg")
-        lemmatized_discursos = [self.__lemmatization(discursos,
-                                                     nlp=nlp,
-                                                     allowed_postags=None)
-                                for discursos in self.discursos]
-        return lemmatized_discursos
-
-    def __lemmatization(self,
-                        texts: list,
-                        nlp: spacy.language.Language,
-                        allowed_postags: list[str] | None = None):
-        if allowed_postags is None:
-            allowed_postags = ["NOUN", "ADJ", "VERB", "ADV"]
-        texts_out = []
-        for sent in texts:
-            doc = nlp(sent)
-            texts_out.append(" ".join([token.lemma_
-                                       if token.lemma_ not in ["-PRON-"]
-                                       else ""
-                                       for token in doc if token.pos_
-                                       in allowed_postags]))
-        return texts_out
+        return self.processer.lemmatization(None,
+                                            batch_size=batch_size,
+                                            n_process=n_process)
 
     def remove_stopwords_punct(self, discursos: list[list[str]]) -> list[str]:
         '''Remove stopwords and punctuation from the data in discursos.'''
-        novos_discursos = []
-        for discurso in discursos:
-            novo_discurso = []
-            for token in discurso:
-                if ((token not in string.punctuation)
-                        and (token not in self.stop_words)):
-                    novo_discurso.append(token)
-            novo_discurso_str = " ".join(novo_discurso)
-            novos_discursos.append(novo_discurso_str)
-        return novos_discursos
+        return self.processer.remove_stop_words_punct(discursos)
+
+    def count_words(self):
+        """Counts the words of each party in a single pass over the speeches.
+
+        Each speech is split only once, and the counters are used by all
+        the metrics of calculate."""
+        self.word_counters = []
+        self.n_words = []
+        for discursos in self.treated_discursos:
+            counter: Counter[str] = Counter()
+            for discurso in discursos:
+                counter.update(discurso.split())
+            self.word_counters.append(counter)
+            self.n_words.append(sum(counter.values()))
+
+    def __counters(self) -> list[Counter]:
+        if self.word_counters is None:
+            self.count_words()
+        return self.word_counters
 
     def medium_word_count(self):
         """This uses the ll_discursos class atributte
         to create a atributte of
         medium word counting for each party"""
-        self.word_count = [self.__medium_word_count(discurso)
-                           for discurso in self.treated_discursos]
-
-    def __medium_word_count(self, discursos) -> float:
-        '''This function creates the medium word count for a single party'''
-        soma_palavras = 0
-        for discurso in discursos:
-            list_discurso = discurso.split()
-            soma_palavras += len(list_discurso)
-        return soma_palavras/len(discursos)
+        self.__counters()
+        self.word_count = [n_words / len(discursos)
+                           for n_words, discursos in zip(
+                               self.n_words, self.treated_discursos)]
 
     def diff_words(self):
         """Creates two different attributes in the class,
         being one of them a list of set of unique words used by each party
         The second attribute created is the attribute
         of the count of number of different words by party."""
-        self.words_diff = [self.__diff_words(discurso)
-                           for discurso in self.treated_discursos]
-        self.words_diff_num = [len(word_diff) for word_diff in self.words_diff]
-
-    def __diff_words(self, discursos) -> set:
-        palavras = set()
-        for discurso in discursos:
-            list_discurso = discurso.split()
-            palavras.update(list_discurso)
-        return palavras
-
-    def most_used_word(self):
-        '''Calculate the most used word for all parties'''
-        if self.words_diff is None:
-            raise AttributeError("""words_diff must be setted.
-                                 Run diff_words method previously to do so""")
-        most_used = [self.__most_used_words(discursos=discursos,
-                                            words=self.words_diff[i])
-                     for i, discursos in enumerate(self.treated_discursos)]
-        self.most_used_words = most_used
-
-    def __most_used_words(self, discursos: list[str], words: set) -> str:
-        '''Calculate the most used word for a single party'''
-        words_count = {word: 0 for word in words}
-        for discurso in discursos:
-            discurso_split = discurso.split()
-            for word in words_count:
-                count_word = discurso_split.count(word)
-                words_count[word] += count_word
-        most_common = max(words_count, key=lambda word: word.get)
-        return most_common
-
-    def calculate(self) -> pd.DataFrame:
+        self.words_diff = [set(counter) for counter in self.__counters()]
+        self.words_diff_num = [len(counter) for counter in self.__counters()]
+
+    def most_used_word(self, top_k: int = 10):
+        '''Calculate the most used word for all parties,
+        and the top_k most used words with their counts'''
+        self.top_words = [counter.most_common(top_k)
+                          for counter in self.__counters()]
+        self.most_used_words = [top_words[0][0] if top_words else ""
+                                for top_words in self.top_words]
+
+    def calculate(self, top_k: int = 10) -> pd.DataFrame:
         '''Calculate all the implemented metrics.
 
         1. Words count
 
         2. Different words count
 
-        3. Most used word
+        3. Most used word, and the top_k most used words as "word:count"
+        separated by spaces
 
         4. Quantity of speeches'''
-        self.medium_word_count()
-        self.diff_words()
-        self.most_used_word()
-        discursos_quantity = [len(discursos)
-                              for discursos in self.treated_discursos]
-        dados = [self.partidos, self.word_count,
-                 self.words_diff_num, self.most_used_words,
-                 discursos_quantity]
-        dados_np = np.array(dados)     # Necessário para fazer a transposição
-        # Mais eficiente
-        dados = np.transpose(dados_np).tolist()
-        dados_columns = ["Partidos", "mediumWordsNumber",
-                         "NumberOfDiffWords", "MostUsedWord",
-                         "discursosQuantity"]
-        df_dados = pd.DataFrame(dados)
-        df_dados.columns = pd.Index(dados_columns)
-        df_dados = df_dados.set_index('Partidos')
-        return df_dados
+        with self.instrumentation.stage("calculate",
+                                        items=len(self.partidos)):
+            self.count_words()
+            self.medium_word_count()
+            self.diff_words()
+            self.most_used_word(top_k)
+            discursos_quantity = [len(discursos)
+                                  for discursos in self.treated_discursos]
+            top_words = [" ".join(f"{word}:{count}" for word, count in words)
+                         for words in self.top_words]
+            df_dados = pd.DataFrame({"Partidos": self.partidos,
+                                     "mediumWordsNumber": self.word_count,
+                                     "NumberOfDiffWords": self.words_diff_num,
+                                     "MostUsedWord": self.most_used_words,
+                                     "MostUsedWords": top_words,
+                                     "discursosQuantity": discursos_quantity})
+            df_dados = df_dados.set_index('Partidos')
+            return df_dados
 
 
 def main():
@@ -172,24 +162,24 @@ def main():
     path = pathlib.Path("./discursos/")
     path_pre_pos = pathlib.Path("./pre_pandemia/")
     path = path.joinpath(path_pre_pos)
-    files = path.iterdir()
-    df_list = [pd.read_csv(file) for file in files]
+    df_list = ler_discursos(path)
     partidos = []
     discursos = []
     for df in df_list:
         partidos.extend(df["sigla"].unique().tolist())
         discursos.append(df["transcricao"].tolist())
 
-    analyzer = DBAnalyzer(ll_discursos=discursos, partidos=partidos)
-    timeinit = time.time()
+    instrumentation = Instrumentation(verbose=True)
+    analyzer = DBAnalyzer(ll_discursos=discursos, partidos=partidos,
+                          cache=LemmaCache(), instrumentation=instrumentation)
     analyzer.treat_discursos()
-    timeend = time.time()
-    print("Elapsed time: " + str(timeend - timeinit))
     dados = analyzer.calculate()
     metricas_path = pathlib.Path("./metricas/")
     metricas_path.mkdir(parents=True, exist_ok=True)
     dados.to_csv(pathlib.Path.joinpath(metricas_path.joinpath(path_pre_pos),
                                        "metricas.csv"))
+    instrumentation.to_json(metricas_path.joinpath(path_pre_pos,
+                                                   "report.json"))
 
 
 def main_orientacao():
@@ -200,15 +190,15 @@ def main_orientacao():
     path = pathlib.Path("./discursos/legis_56/")
     path_gov_opo = pathlib.Path("./governista/")
     path = path.joinpath(path_gov_opo)
-    files = path.iterdir()
-    df_list = [pd.read_csv(file) for file in files]
+    df_list = ler_discursos(path)
     partidos = []
     discursos = []
     for df in df_list:
         partidos.extend(df["sigla"].unique().tolist())
         discursos.append(df["transcricao"].tolist())
 
-    analyzer = DBAnalyzer(ll_discursos=discursos, partidos=partidos)
+    analyzer = DBAnalyzer(ll_discursos=discursos, partidos=partidos,
+                          cache=LemmaCache())
     print("Tratando discursos")
     analyzer.treat_discursos()
     print("Calculando ...")
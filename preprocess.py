@@ -1,7 +1,31 @@
-'''This module has the preprocess function for the code.'''
+'''This module has the preprocess function for the code.
+
+The patterns are compiled once and every speech goes through all the
+transformations at once, so the corpus can also be streamed.'''
 
 
 import re
+from collections.abc import Iterable, Iterator
+
+# Removes the (name - party )
+SPEAKER_HEADER = re.compile(r"\b[A-Z]+(?:\s+[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ'.]+)*\s\([\s\w\-\./]+\)\s\-\s|\b[A-Z]+(?:\s+[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ'.]+)*\s\([\w\s]+\.\s\w+\s\-\s\w+\)\s\-\s")
+FORMS_OF_ADDRESS = re.compile(r"\b[Ss]r[as]*\.")
+NUMBERS = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def preprocess_discurso(discurso: str) -> str:
+    '''Preprocesses a single speech, as preprocess does for a list.'''
+    discurso = discurso.replace("\r\n", "\n")
+    discurso = SPEAKER_HEADER.sub("", discurso)
+    discurso = FORMS_OF_ADDRESS.sub("", discurso)
+    return NUMBERS.sub("", discurso)
+
+
+def iter_preprocess(lista_discursos: Iterable[str]) -> Iterator[str]:
+    '''Generator version of preprocess.
+
+    Yields each preprocessed speech, without building the whole corpus.'''
+    return map(preprocess_discurso, lista_discursos)
 
 
 def preprocess(lista_discursos: list) -> list:
@@ -10,15 +34,4 @@ def preprocess(lista_discursos: list) -> list:
     Takes out \\r\\n for \\n
 
     Also removes the (Name - Party) and it's found alternatives.'''
-    discursos = [discurso.replace("\r\n", "\n")
-                 for discurso in lista_discursos]
-
-    # Removes the (name - party )
-    discursos = [re.sub(r"\b[A-Z]+(?:\s+[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ'.]+)*\s\([\s\w\-\./]+\)\s\-\s|\b[A-Z]+(?:\s+[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ'.]+)*\s\([\w\s]+\.\s\w+\s\-\s\w+\)\s\-\s",
-                        "", discurso)
-                 for discurso in discursos]
-    discursos = [re.sub(r"\b[Ss]r[as]*\.", "", discurso)
-                 for discurso in discursos]
-    discursos = [re.sub(r"\d+(?:[.,]\d+)*", "", discurso)
-                 for discurso in discursos]
-    return discursos
+    return list(iter_preprocess(lista_discursos))
@@ -1,6 +1,7 @@
 """Module that contains the Text Processer for the application
 
-This module contains the [Processer] class."""
+This module contains the [Processer] class, the text treatment shared by
+the topic extractors and by metricas.DBAnalyzer."""
 
 import pathlib
 import string
@@ -8,37 +9,109 @@ import spacy
 from nltk.corpus import stopwords
 import nltk
 
+from lemma_cache import LemmaCache
+from instrumentation import Instrumentation
+
+SPACY_MODEL = "pt_core_news_lg"
+# Only the tagging and the lemmatization are used,
+# the dependency parser and the entity recognizer are not even loaded
+EXCLUDED_PIPES = ["parser", "ner"]
+DEFAULT_POSTAGS = ["NOUN", "ADJ", "VERB", "ADV"]
+# A token is punctuation when it is found inside string.punctuation,
+# so every substring of it is removed, like "(" or "()"
+PUNCTUATION = frozenset(string.punctuation[i:j]
+                        for i in range(len(string.punctuation) + 1)
+                        for j in range(i, len(string.punctuation) + 1))
+
+_nlp_models: dict[str, spacy.language.Language] = {}
+
+
+def load_nlp(model: str = SPACY_MODEL) -> spacy.language.Language:
+    """Returns the spaCy model, loading it only once in the process"""
+    if model not in _nlp_models:
+        _nlp_models[model] = spacy.load(model, exclude=EXCLUDED_PIPES)
+    return _nlp_models[model]
+
 
 class Processer():
     """
     This class processes the text inserted
 
-    It lemmatizes, lower and remove stop_words of all the text."""
-    def __init__(self, discursos) -> None:
-        self.nlp: spacy.language.Language
+    It lemmatizes, lower and remove stop_words of all the text.
+    With a LemmaCache, the speeches already lemmatized are read from it
+    and spaCy is only loaded if some speech is missing.
+
+    The lemmatized speeches are kept for each allowed_postags, so the same
+    Processer can be shared by the extractors and by the DBAnalyzer,
+    treating the corpus only once in a run.
+
+    The lemmatization and the processing are recorded as stages of the
+    instrumentation, a new Instrumentation if None is given."""
+    def __init__(self, discursos, cache: LemmaCache | None = None,
+                 instrumentation: Instrumentation | None = None) -> None:
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+        self.instrumentation = instrumentation
+        self.nlp: spacy.language.Language | None = None
+        self.cache = cache
         self.discursos = discursos
+        self.__lemmatized: dict[tuple[str, ...], list[list[str]]] = {}
         stop_words_path = pathlib.Path("./stop_words.txt")
         stop_words = set(stopwords.words("portuguese"))
         stop_words.update(stop_words_path.read_text("utf-8").splitlines())
         self.stop_words = stop_words
+        self.__removed_tokens = PUNCTUATION | stop_words
 
-    def lemmatization(self, allowed_postags):
-        """Makes the lemmatization on the code of all the speeches"""
-        lemmatized_discursos = [self.__lemmatization(
-            discursos,
-            self.nlp,
-            allowed_postags=allowed_postags)
-            for discursos in self.discursos]
-        return lemmatized_discursos
+    def lemmatization(self, allowed_postags,
+                      batch_size: int = 64,
+                      n_process: int = 1):
+        """Makes the lemmatization on the code of all the speeches
+
+        The speeches are streamed through nlp.pipe in batches of batch_size,
+        using n_process worker processes.
+        The result is kept, later calls with the same allowed_postags
+        return it without treating the speeches again."""
+        if allowed_postags is None:
+            allowed_postags = DEFAULT_POSTAGS
+        postags_key = tuple(sorted(allowed_postags))
+        if postags_key not in self.__lemmatized:
+            with self.instrumentation.stage("lemmatization",
+                                            items=self.__n_discursos()):
+                self.__lemmatized[postags_key] = self.__lemmatize_all(
+                    allowed_postags, batch_size, n_process)
+        return self.__lemmatized[postags_key]
+
+    def __lemmatize_all(self, allowed_postags: list[str],
+                        batch_size: int, n_process: int):
+        def lemmatize(texts: list[str]) -> list[str]:
+            return self.__lemmatization(texts,
+                                        self.__load_nlp(),
+                                        allowed_postags=allowed_postags,
+                                        batch_size=batch_size,
+                                        n_process=n_process)
+
+        if self.cache is None:
+            return [lemmatize(discursos) for discursos in self.discursos]
+        return [self.cache.lemmatize(discursos, allowed_postags, lemmatize)
+                for discursos in self.discursos]
+
+    def __n_discursos(self) -> int:
+        return sum(len(discursos) for discursos in self.discursos)
+
+    def __load_nlp(self) -> spacy.language.Language:
+        if self.nlp is None:
+            self.nlp = load_nlp()
+        return self.nlp
 
     def __lemmatization(self,
                         texts: list[str],
-                        nlp, allowed_postags: list[str] | None = None):
+                        nlp, allowed_postags: list[str] | None = None,
+                        batch_size: int = 64,
+                        n_process: int = 1):
         if allowed_postags is None:
-            allowed_postags = ["NOUN", "ADJ", "VERB", "ADV"]
+            allowed_postags = DEFAULT_POSTAGS
         texts_out = []
-        for sent in texts:
-            doc = nlp(sent)
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
             texts_out.append(" ".join([token.lemma_
                                        if token.lemma_ not in ["-PRON-"]
                                        else ""
@@ -46,20 +119,39 @@ class Processer():
                                        if token.pos_ in allowed_postags]))
         return texts_out
 
-    def __remove_stop_words_punct(self, discursos: list[list[str]]) -> list[str]:
-        novos_discursos = []
-        for discurso in discursos:
-            novo_discurso = []
-            for token in discurso:
-                if ((token not in string.punctuation)
-                        and (token not in self.stop_words)):
-                    novo_discurso.append(token)
-                novo_discurso_str = " ".join(novo_discurso)
-                novos_discursos.append(novo_discurso_str)
-        return novos_discursos
+    def remove_stop_words_punct(self,
+                                discursos: list[list[str]]) -> list[str]:
+        """Removes stop words and punctuation from tokenized speeches.
+
+        Returns one string for each speech, with the remaining tokens
+        joined by spaces. Each token is checked once on a single set."""
+        removed_tokens = self.__removed_tokens
+        return [" ".join([token for token in discurso
+                          if token not in removed_tokens])
+                for discurso in discursos]
+
+    def tokenize(self,
+                 allowed_postags: list[str] | None = None,
+                 batch_size: int = 64,
+                 n_process: int = 1) -> list[list[list[str]]]:
+        """Lemmatizes, lowers and tokenizes all the speeches,
+        without removing stop words and punctuation.
+        The parameters are the same of process_text."""
+        lemmatized_discursos = self.lemmatization(allowed_postags,
+                                                  batch_size=batch_size,
+                                                  n_process=n_process)
+        discursos_lower = [[discurso.lower()
+                            for discurso in discursos]
+                           for discursos in lemmatized_discursos]
+        discursos_tokenized = [[nltk.word_tokenize(discurso)
+                                for discurso in discursos]
+                               for discursos in discursos_lower]
+        return discursos_tokenized
 
     def process_text(self,
-                     allowed_postags: list[str] | None = None) -> list[list[str]]:
+                     allowed_postags: list[str] | None = None,
+                     batch_size: int = 64,
+                     n_process: int = 1) -> list[list[str]]:
         """Processes the text before it can enter the process of vectorizing.
         Parameters:
             allowed_postags:Says which type of postags are permitted.
@@ -71,17 +163,18 @@ class Processer():
             * Adverb (ADV),
             * Verb (VERB),
             * Punctuation (PUNCT)
+
+            batch_size: Number of speeches given to spaCy at once.
+
+            n_process: Number of processes used by spaCy.
         Returns:
             None. To get treated discursos use get_processed_text method"""
-        self.nlp = spacy.load("pt_core_news_lg")
-        lemmatized_discursos = self.lemmatization(allowed_postags)
-        discursos_lower = [[discurso.lower()
-                            for discurso in discursos]
-                           for discursos in lemmatized_discursos]
-        discursos_tokenized = [[nltk.word_tokenize(discurso)
-                                for discurso in discursos]
-                               for discursos in discursos_lower]
-        treated_discursos = [self.__remove_stop_words_punct(
-            discursos=discursos)
-            for discursos in discursos_tokenized]
-        return treated_discursos
+        with self.instrumentation.stage("process_text",
+                                        items=self.__n_discursos()):
+            discursos_tokenized = self.tokenize(allowed_postags,
+                                                batch_size=batch_size,
+                                                n_process=n_process)
+            treated_discursos = [self.remove_stop_words_punct(
+                discursos=discursos)
+                for discursos in discursos_tokenized]
+            return treated_discursos
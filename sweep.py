@@ -0,0 +1,171 @@
+'''Module that searches the number of topics of the extractors.
+
+The speeches are processed and vectorized once, by a BowLda, and the
+models of each configuration of the grid are fitted in parallel over the
+same count matrices. The [sweep] function reports, for each party and
+configuration, the perplexity, the UMass coherence, the wall time and the
+peak of memory of the fitting.
+'''
+
+import itertools
+import pathlib
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import sklearn.feature_extraction.text as sklearntext
+
+import extractors_class
+from leitura import ler_discursos
+from lemma_cache import LemmaCache
+
+MODELS = ("lda", "pbg")
+
+
+def umass_coherence(data_counts, top_words: np.ndarray) -> float:
+    """Mean UMass coherence of the topics.
+
+    Parameters:
+        data_counts: The count matrix the model was fitted on.
+        top_words: The column of the keywords of each topic,
+            a row for each topic, ordered from the greatest weight.
+    Returns:
+        The mean over the topics of the sum, for every pair of keywords,
+        of log((D(w_i, w_j) + 1) / D(w_j)), where D counts the speeches
+        with the words and w_j has a greater weight than w_i."""
+    binary = (data_counts > 0).astype(np.float64).tocsc()
+    coherences = []
+    for words in top_words:
+        # Only the columns of the keywords are multiplied
+        columns = binary[:, words]
+        co_documents = (columns.T @ columns).toarray()
+        documents = np.diag(co_documents)
+        i, j = np.tril_indices(len(words), k=-1)
+        with np.errstate(divide="ignore"):
+            scores = np.log((co_documents[i, j] + 1) / documents[j])
+        coherences.append(scores[np.isfinite(scores)].sum())
+    return float(np.mean(coherences))
+
+
+def _fit_configuration(data_counts, feature_names, model: str,
+                       n_components: int, batch_size: int | None,
+                       n_words: int) -> dict:
+    """Fits and evaluates a model of a party.
+
+    It is a module function so it can be sent to the worker processes."""
+    tracemalloc.start()
+    init_time = time.perf_counter()
+    if model == "lda":
+        lda_model = extractors_class.fit_lda(
+            data_counts, n_components, n_jobs=1, batch_size=batch_size)
+        perplexity = lda_model.perplexity(data_counts)
+        # With the column numbers as feature names
+        # the keywords are the columns of the words
+        top_words, _ = extractors_class.top_keywords(
+            lda_model.components_, np.arange(data_counts.shape[1]), n_words)
+    else:
+        _, keywords = extractors_class.fit_pbg(
+            sklearntext.TfidfTransformer().fit_transform(data_counts),
+            feature_names, n_components, n_words)
+        perplexity = np.nan
+        columns = {word: i for i, word in enumerate(feature_names)}
+        top_words = np.vectorize(columns.get)(keywords)
+    elapsed = time.perf_counter() - init_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"perplexity": perplexity,
+            "coherence": umass_coherence(data_counts, top_words),
+            "time": elapsed,
+            "peak_memory": peak / 1e6}
+
+
+def sweep(extractor: extractors_class.BowLda,
+          n_components: list[int],
+          batch_sizes: list[int] | None = None,
+          model: str = "lda",
+          n_words: int = 10,
+          n_jobs: int = -1) -> pd.DataFrame:
+    """Fits a model for each party and configuration of the grid.
+
+    Parameters:
+        extractor: A BowLda with the speeches already vectorized,
+            by process_text and data_vectorizer.
+        n_components: The numbers of topics to be tried.
+        batch_sizes: The batch sizes of LDA to be tried,
+            only 128 if None. They are not used by PBG.
+        model: "lda" or "pbg", PBG is fitted on the TF-IDF
+            created from the counts of the extractor.
+        n_words: Number of keywords of each topic used on the coherence.
+        n_jobs: Number of processes fitting the configurations at once,
+            -1 uses every core, capped as in extractors_class.max_workers.
+    Returns:
+        A DataFrame with a row for each party and configuration, with the
+        columns partido, model, n_components, batch_size, perplexity
+        (NaN for PBG), coherence, time (seconds) and peak_memory (MB)."""
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {MODELS}, not {model}")
+    if model == "pbg" or batch_sizes is None:
+        batch_sizes = [None] if model == "pbg" else [128]
+    configurations = list(itertools.product(range(len(extractor.partidos)),
+                                            n_components,
+                                            batch_sizes))
+    arguments = ([extractor.data_vectorized[i] for i, _, _ in configurations],
+                 [extractor.feature_names[i] for i, _, _ in configurations],
+                 [model] * len(configurations),
+                 [n_components_ for _, n_components_, _ in configurations],
+                 [batch_size for _, _, batch_size in configurations],
+                 [n_words] * len(configurations))
+    workers = extractors_class.max_workers(arguments[0], max(n_components),
+                                           n_jobs)
+    if workers == 1:
+        results = list(map(_fit_configuration, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_fit_configuration, *arguments))
+    return pd.DataFrame([{"partido": extractor.partidos[i],
+                          "model": model,
+                          "n_components": n_components_,
+                          "batch_size": batch_size,
+                          **result}
+                         for (i, n_components_, batch_size), result
+                         in zip(configurations, results)])
+
+
+def main():
+    '''
+    Searches the number of topics of Novo in 2022.
+
+    The speeches are processed once and the results of LDA and PBG
+    are saved on the determined path.'''
+    path_reading = pathlib.Path("./discursos/parquet/")
+    save_path = pathlib.Path("./topics/sweep/legis_56/p_novo/2022/")
+    df_list = ler_discursos(path_reading,
+                            legislaturas=[56],
+                            partidos=["NOVO"],
+                            anos=[2022])
+    partidos = []
+    discursos = []
+    for df in df_list:
+        partidos.extend(df["sigla"].unique().tolist())
+        discursos.append(df["transcricao"].tolist())
+
+    lda = extractors_class.BowLda(discursos=discursos, partidos=partidos,
+                                  n_components=12, cache=LemmaCache())
+    print("Processando")
+    lda.process_text()
+    lda.data_vectorizer()
+    print("Testando LDA")
+    results_lda = sweep(lda, n_components=[5, 8, 12, 20, 30],
+                        batch_sizes=[64, 128, 256])
+    print("Testando PBG")
+    results_pbg = sweep(lda, n_components=[5, 8, 12, 20, 30], model="pbg")
+    results = pd.concat([results_lda, results_pbg], ignore_index=True)
+    print(results.to_string())
+    save_path.mkdir(parents=True, exist_ok=True)
+    results.to_csv(save_path.joinpath("sweep.csv"), index=False)
+
+
+if __name__ == "__main__":
+    main()